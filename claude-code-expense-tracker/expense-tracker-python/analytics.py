@@ -0,0 +1,125 @@
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # analytics endpoints answer 503 without NumPy
+    np = None
+
+from models import CategoryBreakdown, ExpenseCategory, Granularity, TimeseriesPoint, to_naive_local
+from columnar import CATEGORIES, CATEGORY_CODES, to_epoch_us
+
+
+US_PER_DAY = 86_400_000_000
+EPOCH_DATE = date(1970, 1, 1)
+
+
+class AnalyticsUnavailable(RuntimeError):
+    """Raised when NumPy is not installed"""
+
+
+class ColumnSnapshot:
+    """NumPy copy of the amount/date/category columns at one storage version"""
+
+    def __init__(self, version: int, cents, dates, categories):
+        self.version = version
+        self.cents = np.frombuffer(cents, dtype=np.int64) if len(cents) else np.zeros(0, dtype=np.int64)
+        self.dates = np.frombuffer(dates, dtype=np.int64) if len(dates) else np.zeros(0, dtype=np.int64)
+        self.categories = np.frombuffer(categories, dtype=np.int8) if len(categories) else np.zeros(0, dtype=np.int8)
+
+
+class AnalyticsEngine:
+    """Vectorized totals, category breakdowns and time series over a storage backend.
+
+    The columns are pulled from ``storage.column_snapshot()`` once per data
+    version and reused until the next write.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._snapshot: Optional[ColumnSnapshot] = None
+        self._lock = threading.Lock()
+
+    def _columns(self) -> ColumnSnapshot:
+        if np is None:
+            raise AnalyticsUnavailable("NumPy is required for analytics")
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self.storage.version:
+                version, (cents, dates, categories) = self.storage.column_snapshot()
+                self._snapshot = ColumnSnapshot(version, cents, dates, categories)
+            return self._snapshot
+
+    def _mask(self, columns: ColumnSnapshot, category: Optional[ExpenseCategory],
+              start_date: Optional[datetime], end_date: Optional[datetime]):
+        mask = np.ones(len(columns.cents), dtype=bool)
+        if category is not None:
+            mask &= columns.categories == CATEGORY_CODES[category]
+        if start_date is not None:
+            mask &= columns.dates >= to_epoch_us(to_naive_local(start_date))
+        if end_date is not None:
+            mask &= columns.dates <= to_epoch_us(to_naive_local(end_date))
+        return mask
+
+    def breakdown(self, start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None) -> List[CategoryBreakdown]:
+        """Total, count, average and share of spending per category"""
+        columns = self._columns()
+        mask = self._mask(columns, None, start_date, end_date)
+        codes = columns.categories[mask].astype(np.intp)
+        totals = np.bincount(codes, weights=columns.cents[mask], minlength=len(CATEGORIES))
+        counts = np.bincount(codes, minlength=len(CATEGORIES))
+        grand_total = totals.sum()
+
+        return [
+            CategoryBreakdown(
+                category=category.value,
+                total=totals[code] / 100,
+                count=int(counts[code]),
+                average=totals[code] / counts[code] / 100 if counts[code] else 0.0,
+                share=totals[code] / grand_total if grand_total else 0.0
+            )
+            for code, category in enumerate(CATEGORIES)
+        ]
+
+    def timeseries(self, granularity: Granularity = Granularity.DAY,
+                   category: Optional[ExpenseCategory] = None,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> List[TimeseriesPoint]:
+        """Spending per day, week (starting Monday) or month, with empty periods filled with zeros"""
+        columns = self._columns()
+        mask = self._mask(columns, category, start_date, end_date)
+        cents = columns.cents[mask]
+        if not len(cents):
+            return []
+
+        days = columns.dates[mask] // US_PER_DAY
+        if granularity == Granularity.DAY:
+            buckets = days
+        elif granularity == Granularity.WEEK:
+            # 1970-01-01 was a Thursday; shift so weeks start on Monday
+            buckets = (days + 3) // 7
+        else:
+            buckets = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+        first = buckets.min()
+        offsets = buckets - first
+        totals = np.bincount(offsets, weights=cents)
+        counts = np.bincount(offsets)
+
+        return [
+            TimeseriesPoint(
+                period=_bucket_start(int(first) + offset, granularity),
+                total=totals[offset] / 100,
+                count=int(counts[offset])
+            )
+            for offset in range(len(totals))
+        ]
+
+
+def _bucket_start(bucket: int, granularity: Granularity) -> date:
+    if granularity == Granularity.DAY:
+        return EPOCH_DATE + timedelta(days=bucket)
+    if granularity == Granularity.WEEK:
+        return EPOCH_DATE + timedelta(days=bucket * 7 - 3)
+    return date(1970 + bucket // 12, bucket % 12 + 1, 1)
@@ -1,12 +1,30 @@
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import Response
-from typing import List, Optional
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from models import (
     Expense, ExpenseCreate, ExpenseUpdate, ExpenseFilter, 
-    ExpenseSummary, ExpenseCategory
+    ExpenseSummary, ExpenseCategory, BulkImportResult,
+    Granularity, TimeseriesPoint, CategoryBreakdown
+)
+from analytics import AnalyticsEngine, AnalyticsUnavailable
+from bulk_import import IMPORT_BATCH_BYTES, BulkImport
+from storage import create_storage
+from async_storage import AsyncExpenseStorage
+from response_cache import CachedResponse, ResponseCache, etag_matches, normalize_params
+from profiling import RequestProfiler
+from events import format_sse
+from metrics import (
+    CONTENT_TYPE, HTTP_REQUEST_SECONDS, REGISTRY, RESPONSE_CACHE_BYTES, RESPONSE_CACHE_LOOKUPS, STORAGE_ROWS,
+    STORAGE_VERSION
 )
-from storage import ExpenseStorage
 
 app = FastAPI(
     title="Expense Tracker API",
@@ -14,8 +32,114 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize storage
-storage = ExpenseStorage()
+# Every endpoint except the health check, so the NiceGUI app can serve the API
+# in-process by including this router (see main.py)
+router = APIRouter()
+
+# Initialize storage (JSON journal by default, SQLite with EXPENSE_STORAGE=sqlite).
+# Handlers use the async facade so storage work never blocks the event loop.
+storage = AsyncExpenseStorage(create_storage())
+analytics = AnalyticsEngine(storage.storage)
+# Serialized GET responses keyed by (path, query params, data version); bodies
+# over 4 MiB (e.g. an unpaginated listing of a large ledger) are not kept
+response_cache = ResponseCache(max_entries=256, max_bytes=32 * 1024 * 1024, max_entry_bytes=4 * 1024 * 1024)
+
+# The summary's "last 30 days" total moves with the clock, not only with writes
+SUMMARY_MAX_AGE = 60.0
+
+# Comment lines sent on an idle event stream, so proxies and clients can tell it is alive
+EVENT_HEARTBEAT = 15.0
+
+# Largest bulk import body accepted; it is parsed as it arrives, never held whole
+MAX_IMPORT_BYTES = int(os.environ.get("EXPENSE_MAX_IMPORT_BYTES", str(64 * 1024 * 1024)))
+
+# Profiles requests that send X-Profile or ?profile=1, plus a random sample kept only when slow
+profiler = RequestProfiler(
+    sample_rate=float(os.environ.get("EXPENSE_PROFILE_SAMPLE_RATE", "0")),
+    slow_ms=float(os.environ.get("EXPENSE_PROFILE_SLOW_MS", "250"))
+)
+
+# Gauges read at scrape time, so they cost nothing per request (they query storage,
+# so /metrics renders in the storage thread pool)
+STORAGE_ROWS.set_function(storage.storage.count, backend=storage.storage.backend)
+STORAGE_VERSION.set_function(lambda: storage.storage.version, backend=storage.storage.backend)
+RESPONSE_CACHE_LOOKUPS.set_function(lambda: response_cache.hits, result="hit")
+RESPONSE_CACHE_LOOKUPS.set_function(lambda: response_cache.misses, result="miss")
+RESPONSE_CACHE_BYTES.set_function(lambda: response_cache.size)
+
+
+async def record_request_metrics(request: Request, call_next):
+    """Record request latency per route template, so /api/expenses/{expense_id} is one series"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+
+# Stored expenses are already valid, so responses serialize them directly instead of
+# re-validating them against the response model (which stays for the OpenAPI schema)
+EXPENSE_LIST = TypeAdapter(List[Expense])
+
+
+def _json_bytes(content: Any) -> bytes:
+    """Serialize stored expenses, pages of them, or any other response content to JSON"""
+    if isinstance(content, list) and content and isinstance(content[0], Expense):
+        return EXPENSE_LIST.dump_json(content)
+    return to_json(content)
+
+
+def _json(content: Any) -> Response:
+    return Response(content=_json_bytes(content), media_type="application/json")
+
+
+async def profile_requests(request: Request, call_next):
+    """Profile opted-in and sampled requests (see profiling.py)"""
+    return await profiler.profile(request, call_next)
+
+
+def install_middlewares(target_app: FastAPI):
+    """Add the metrics and profiling middlewares to the app that serves ``router``.
+    
+    Middlewares wrap a whole app, not a router, so in-process mode (main.py)
+    installs them on NiceGUI's app as well.
+    """
+    target_app.middleware("http")(record_request_metrics)
+    target_app.middleware("http")(profile_requests)
+
+
+async def _cached(
+    request: Request,
+    load: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+    max_age: Optional[float] = None
+) -> Response:
+    """Serve a JSON response from the cache, or build and cache it with ``load``.
+    
+    ``load`` returns the content and any extra headers. Every response
+    carries an ETag; a matching If-None-Match gets an empty 304.
+    """
+    # Read the version before loading, so a write during the load can only make the entry newer than its key
+    key = (request.url.path, normalize_params(request.query_params.multi_items()), await storage.get_version())
+    entry = response_cache.get(key)
+    if entry is None:
+        content, headers = await load()
+        body = _json_bytes(content)
+        entry = CachedResponse(body, headers, max_age)
+        response_cache.put(key, entry)
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @app.get("/")
@@ -24,83 +148,250 @@ async def root():
     return {"message": "Expense Tracker API is running"}
 
 
-@app.post("/api/expenses", response_model=Expense)
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request and storage metrics in the Prometheus text format"""
+    return Response(await storage.run(REGISTRY.render), media_type=CONTENT_TYPE)
+
+
+@router.get("/api/debug/profiles")
+async def get_profiles(limit: Optional[int] = Query(None, ge=1)):
+    """Stored request profiles with their hottest functions, newest first"""
+    return profiler.profiles(limit)
+
+
+@router.get("/api/events")
+async def stream_events():
+    """Server-sent events for every change: the changed expense, then a ``summary`` event.
+    
+    Summaries are coalesced, so a burst of writes is followed by one
+    ``summary`` event. The stream opens with a ``ready`` event carrying the
+    current version.
+    After a ``resync`` event the client has missed changes and should
+    refetch what it shows.
+    """
+    async def stream() -> AsyncIterator[str]:
+        async with storage.events.subscribe() as queue:
+            yield format_sse({"type": "ready", "version": await storage.get_version()})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/api/expenses", response_model=Expense)
 async def create_expense(expense: ExpenseCreate):
     """Create a new expense"""
     try:
-        return storage.create_expense(expense)
+        return _json(await storage.create_expense(expense))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/api/expenses", response_model=List[Expense])
+@router.post("/api/expenses/bulk", response_model=BulkImportResult)
+async def bulk_import_expenses(
+    request: Request,
+    atomic: bool = Query(False, description="Import nothing if any row is invalid")
+):
+    """Import many expenses from a JSON array, NDJSON or CSV body.
+    
+    The body is parsed and validated in batches as it streams in, up to
+    MAX_IMPORT_BYTES. Valid rows are committed with a single storage flush;
+    invalid rows are reported by their 1-based position in the input: the
+    array element, or the line a NDJSON or CSV row starts on (the CSV
+    header is line 1).
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import body exceeds {MAX_IMPORT_BYTES} bytes")
+    
+    bulk = BulkImport(request.headers.get("content-type", ""))
+    received = 0
+    pending = []
+    pending_size = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_IMPORT_BYTES:
+                raise HTTPException(status_code=413, detail=f"Import body exceeds {MAX_IMPORT_BYTES} bytes")
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= IMPORT_BATCH_BYTES:
+                await run_in_threadpool(bulk.feed, b"".join(pending))
+                pending = []
+                pending_size = 0
+        await run_in_threadpool(bulk.feed, b"".join(pending), True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if atomic and bulk.failed:
+        result = BulkImportResult(created=0, failed=bulk.failed, errors=bulk.errors)
+        return JSONResponse(status_code=400, content=jsonable_encoder(result))
+    
+    created = await storage.create_many(bulk.valid) if bulk.valid else []
+    return BulkImportResult(created=len(created), failed=bulk.failed, errors=bulk.errors)
+
+
+@router.get("/api/expenses", response_model=List[Expense])
 async def get_expenses(
+    request: Request,
     category: Optional[ExpenseCategory] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    search_term: Optional[str] = Query(None)
+    search_term: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of expenses to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return")
 ):
-    """Get all expenses with optional filtering"""
+    """Get expenses with optional filtering, newest first.
+    
+    When more results remain after ``limit``, the cursor for the next page is
+    returned in the ``X-Next-Cursor`` header. With ``fields`` the rows are
+    partial expenses restricted to those fields.
+    """
     filters = ExpenseFilter(
         category=category,
         start_date=start_date,
         end_date=end_date,
         search_term=search_term
     )
-    return storage.get_all_expenses(filters)
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    
+    async def load():
+        try:
+            expenses, next_cursor = await storage.get_expenses_page(
+                filters, limit=limit, cursor=cursor, fields=field_list
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return expenses, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    
+    return await _cached(request, load)
+
 
+@router.get("/api/expenses/search", response_model=List[Expense])
+async def search_expenses(
+    q: str = Query(..., min_length=1, description="Words or word prefixes that must all appear in the description"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search expense descriptions, best match first"""
+    return _json(await storage.search(q, limit))
 
-@app.get("/api/expenses/{expense_id}", response_model=Expense)
+
+@router.get("/api/expenses/{expense_id}", response_model=Expense)
 async def get_expense(expense_id: str):
     """Get a specific expense by ID"""
-    expense = storage.get_expense(expense_id)
+    expense = await storage.get_expense(expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    return expense
+    return _json(expense)
 
 
-@app.put("/api/expenses/{expense_id}", response_model=Expense)
+@router.put("/api/expenses/{expense_id}", response_model=Expense)
 async def update_expense(expense_id: str, expense_update: ExpenseUpdate):
     """Update an existing expense"""
     try:
-        updated_expense = storage.update_expense(expense_id, expense_update)
+        updated_expense = await storage.update_expense(expense_id, expense_update)
         if not updated_expense:
             raise HTTPException(status_code=404, detail="Expense not found")
-        return updated_expense
+        return _json(updated_expense)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.delete("/api/expenses/{expense_id}")
+@router.delete("/api/expenses/{expense_id}")
 async def delete_expense(expense_id: str):
     """Delete an expense"""
-    if not storage.delete_expense(expense_id):
+    if not await storage.delete_expense(expense_id):
         raise HTTPException(status_code=404, detail="Expense not found")
     return {"message": "Expense deleted successfully"}
 
 
-@app.get("/api/summary", response_model=ExpenseSummary)
-async def get_summary():
+@router.get("/api/summary", response_model=ExpenseSummary)
+async def get_summary(request: Request):
     """Get expense summary and analytics"""
-    return storage.get_summary()
+    async def load():
+        return await storage.get_summary(), {}
+    
+    return await _cached(request, load, max_age=SUMMARY_MAX_AGE)
 
 
-@app.get("/api/categories", response_model=List[str])
-async def get_categories():
-    """Get all available expense categories"""
-    return [category.value for category in ExpenseCategory]
+@router.get("/api/analytics/timeseries", response_model=List[TimeseriesPoint])
+async def get_timeseries(
+    granularity: Granularity = Query(Granularity.DAY),
+    category: Optional[ExpenseCategory] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """Get spending totals per day, week or month"""
+    try:
+        return await storage.run(analytics.timeseries, granularity, category, start_date, end_date)
+    except AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/api/analytics/breakdown", response_model=List[CategoryBreakdown])
+async def get_breakdown(
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None)
+):
+    """Get total, count, average and share of spending per category"""
+    try:
+        return await storage.run(analytics.breakdown, start_date, end_date)
+    except AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
-@app.get("/api/export/csv")
-async def export_csv():
-    """Export expenses to CSV"""
-    csv_content = storage.export_to_csv()
+@router.get("/api/categories", response_model=List[str])
+async def get_categories(request: Request):
+    """Get all available expense categories"""
+    async def load():
+        return [category.value for category in ExpenseCategory], {}
     
-    if csv_content == "No expenses to export":
+    return await _cached(request, load)
+
+
+@router.get("/api/export/csv")
+async def export_csv(
+    category: Optional[ExpenseCategory] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    search_term: Optional[str] = Query(None)
+):
+    """Stream expenses as CSV, with the same filters as the expense list"""
+    filters = ExpenseFilter(
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        search_term=search_term
+    )
+    chunks = storage.iter_csv(filters)
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
         raise HTTPException(status_code=404, detail="No expenses to export")
     
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        _prepend(first_chunk, chunks),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=expenses.csv"}
-    )
\ No newline at end of file
+    )
+
+
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+install_middlewares(app)
+app.include_router(router)
@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import json
+import httpx
+from pydantic import ValidationError
+
+from models import ExpenseCreate, ExpenseFilter, ExpenseUpdate
+from engines import expense_to_dict
+
+# API base URL
+API_BASE_URL = "http://localhost:8001/api"
+
+# Fail fast when the API is down, but leave room for large exports
+TIMEOUT = httpx.Timeout(15.0, connect=2.0)
+LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0)
+
+# The event stream is idle between changes; the API sends a keep-alive every 15 seconds
+EVENTS_TIMEOUT = httpx.Timeout(60.0, connect=2.0)
+
+
+class ApiError(Exception):
+    """A failed API call; ``status_code`` is None when the API could not be reached"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _error_detail(response: httpx.Response) -> str:
+    try:
+        return str(response.json()["detail"])
+    except (ValueError, KeyError, TypeError):
+        return response.text or response.reason_phrase
+
+
+class ApiClient:
+    """Async client for the expense API, shared by every UI session.
+
+    One pooled ``httpx.AsyncClient`` keeps connections to the API alive
+    between calls, so a request costs a round trip rather than a new
+    connection, and waiting on the API never blocks the event loop.
+    Error responses and network failures raise ``ApiError``.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: httpx.Timeout = TIMEOUT,
+                 limits: httpx.Limits = LIMITS):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = limits
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use, from the event loop that will run it
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def close(self):
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise ApiError(_error_detail(e.response), e.response.status_code) from e
+        except httpx.HTTPError as e:
+            raise ApiError(f"API unreachable: {e}") from e
+        return response
+
+    async def get_expenses(self, **params: Any) -> List[Dict[str, Any]]:
+        """List expenses; ``params`` are the /expenses query parameters"""
+        return (await self._request("GET", "/expenses", params=params)).json()
+
+    async def get_expenses_page(self, limit: int, cursor: Optional[str] = None,
+                                **filters: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of expenses and the cursor of the next page (None on the last page)"""
+        params = {"limit": limit, **filters}
+        if cursor:
+            params["cursor"] = cursor
+        response = await self._request("GET", "/expenses", params=params)
+        return response.json(), response.headers.get("X-Next-Cursor")
+
+    async def get_summary(self) -> Dict[str, Any]:
+        """Get the analytics summary"""
+        return (await self._request("GET", "/summary")).json()
+
+    async def create_expense(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an expense"""
+        return (await self._request("POST", "/expenses", json=data)).json()
+
+    async def update_expense(self, expense_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an expense"""
+        return (await self._request("PUT", f"/expenses/{expense_id}", json=data)).json()
+
+    async def delete_expense(self, expense_id: str):
+        """Delete an expense"""
+        await self._request("DELETE", f"/expenses/{expense_id}")
+
+    async def export_csv(self) -> bytes:
+        """Download the CSV export"""
+        return (await self._request("GET", "/export/csv")).content
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the change events of /events until the stream ends"""
+        try:
+            async with self.client.stream("GET", "/events", timeout=EVENTS_TIMEOUT) as response:
+                response.raise_for_status()
+                data: List[str] = []
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        data.append(line[5:].lstrip())
+                    elif not line and data:
+                        yield json.loads("\n".join(data))
+                        data = []
+        except httpx.HTTPStatusError as e:
+            raise ApiError(f"Event stream refused: {e.response.status_code}", e.response.status_code) from e
+        except httpx.HTTPError as e:
+            raise ApiError(f"API unreachable: {e}") from e
+
+
+@contextmanager
+def _api_errors():
+    # The status codes the API's handlers answer with
+    try:
+        yield
+    except ValidationError as e:
+        raise ApiError(str(e), 422) from e
+    except ValueError as e:
+        raise ApiError(str(e), 400) from e
+
+
+class LocalExpenseClient:
+    """The ``ApiClient`` interface served by an in-process ``AsyncExpenseStorage``.
+
+    Used when the UI and the API share one process: calls go straight to
+    the storage behind the API routes, without an HTTP round trip or JSON
+    encoding, and return the same data the API would. Failures raise
+    ``ApiError`` with the status code the API would have answered with.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    async def close(self):
+        """Nothing to close; the storage outlives its clients"""
+
+    async def get_expenses(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                           **filters: Any) -> List[Dict[str, Any]]:
+        """List expenses; ``filters`` are the /expenses filter parameters"""
+        return (await self.get_expenses_page(limit, cursor, **filters))[0]
+
+    async def get_expenses_page(self, limit: Optional[int], cursor: Optional[str] = None,
+                                **filters: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of expenses and the cursor of the next page (None on the last page)"""
+        with _api_errors():
+            expenses, next_cursor = await self.storage.get_expenses_page(
+                ExpenseFilter(**filters), limit=limit, cursor=cursor
+            )
+        return [expense_to_dict(expense) for expense in expenses], next_cursor
+
+    async def get_summary(self) -> Dict[str, Any]:
+        """Get the analytics summary"""
+        return (await self.storage.get_summary()).dict()
+
+    async def create_expense(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an expense"""
+        with _api_errors():
+            return expense_to_dict(await self.storage.create_expense(ExpenseCreate(**data)))
+
+    async def update_expense(self, expense_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an expense"""
+        with _api_errors():
+            expense = await self.storage.update_expense(expense_id, ExpenseUpdate(**data))
+        if expense is None:
+            raise ApiError("Expense not found", 404)
+        return expense_to_dict(expense)
+
+    async def delete_expense(self, expense_id: str):
+        """Delete an expense"""
+        if not await self.storage.delete_expense(expense_id):
+            raise ApiError("Expense not found", 404)
+
+    async def export_csv(self) -> bytes:
+        """Render the CSV export"""
+        chunks = [chunk async for chunk in self.storage.iter_csv()]
+        if not chunks:
+            raise ApiError("No expenses to export", 404)
+        return "".join(chunks).encode("utf-8")
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield change events, starting with ``ready``, like /events"""
+        async with self.storage.events.subscribe() as queue:
+            yield {"type": "ready", "version": await self.storage.get_version()}
+            while True:
+                yield await queue.get()
@@ -0,0 +1,142 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from profiling import in_current_profile
+from engines import expense_to_dict
+from events import EventBus
+from models import Expense, ExpenseCreate, ExpenseUpdate, ExpenseFilter, ExpenseSummary
+
+
+class AsyncExpenseStorage:
+    """Async facade over ExpenseStorage or SqliteExpenseStorage.
+
+    Every call runs in a thread pool so file I/O and scans never block the
+    event loop. Writes get their own, larger pool: each write blocks its
+    thread until it is durable, and the storage's write coordinator groups
+    the writers waiting at the same time into one engine write.
+
+    Every write made through the facade is published on ``events`` with the
+    changed expense, so views can patch themselves instead of refetching.
+    The updated summary follows in a ``summary`` event, computed at most once
+    per ``summary_delay`` however many writes land, since on SQLite it scans
+    the table. Writes by other processes sharing the storage are not published.
+    """
+
+    def __init__(self, storage, max_workers: int = 4, max_writers: int = 32, summary_delay: float = 0.1):
+        self.storage = storage
+        self.events = EventBus()
+        self.summary_delay = summary_delay
+        self._summary_task: Optional[asyncio.Task] = None
+        self._summary_stale = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="expense-storage")
+        self._write_executor = ThreadPoolExecutor(max_workers=max_writers, thread_name_prefix="expense-writer")
+
+    async def get_version(self) -> int:
+        """Data version of the wrapped storage.
+
+        Read in the thread pool: a shared JSON storage first catches up with
+        other processes under a file lock, and SQLite waits for its connection.
+        """
+        return await self.run(lambda: self.storage.version)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the storage thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, in_current_profile(functools.partial(fn, *args, **kwargs)))
+
+    async def _write(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, in_current_profile(functools.partial(fn, *args)))
+
+    def _summary_state(self) -> Tuple[int, ExpenseSummary]:
+        # The version is read first, so the summary is at least as new as it
+        return self.storage.version, self.storage.get_summary()
+
+    async def _publish(self, change: str, **fields: Any):
+        """Publish a change event with the current version, if anyone listens, and schedule a summary event"""
+        if not len(self.events):
+            return
+        self.events.publish({"type": change, "version": await self.get_version(), **fields})
+        self._summary_stale = True
+        if self._summary_task is None or self._summary_task.done():
+            self._summary_task = asyncio.get_running_loop().create_task(self._publish_summary())
+
+    async def _publish_summary(self):
+        """Publish the summary once the writes of the last ``summary_delay`` are in, until none are pending"""
+        while self._summary_stale:
+            await asyncio.sleep(self.summary_delay)
+            self._summary_stale = False
+            if not len(self.events):
+                return
+            version, summary = await self.run(self._summary_state)
+            self.events.publish({"type": "summary", "version": version, "summary": summary.dict()})
+
+    async def create_expense(self, expense_data: ExpenseCreate) -> Expense:
+        """Create a new expense"""
+        expense = await self._write(self.storage.create_expense, expense_data)
+        await self._publish("created", expense=expense_to_dict(expense))
+        return expense
+
+    async def create_many(self, expenses_data: List[ExpenseCreate]) -> List[Expense]:
+        """Create many expenses with a single storage flush"""
+        expenses = await self._write(self.storage.create_many, expenses_data)
+        await self._publish("imported", count=len(expenses))
+        return expenses
+
+    async def get_expense(self, expense_id: str) -> Optional[Expense]:
+        """Get expense by ID"""
+        return await self.run(self.storage.get_expense, expense_id)
+
+    async def get_all_expenses(self, filters: Optional[ExpenseFilter] = None) -> List[Expense]:
+        """Get all expenses with optional filtering, newest first"""
+        return await self.run(self.storage.get_all_expenses, filters)
+
+    async def get_expenses_page(
+        self,
+        filters: Optional[ExpenseFilter] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get one page of filtered expenses and the cursor for the next page"""
+        return await self.run(self.storage.get_expenses_page, filters, limit=limit, cursor=cursor, fields=fields)
+
+    async def search(self, query: str, limit: int = 20) -> List[Expense]:
+        """Ranked description search"""
+        return await self.run(self.storage.search, query, limit)
+
+    async def update_expense(self, expense_id: str, update_data: ExpenseUpdate) -> Optional[Expense]:
+        """Update an existing expense"""
+        expense = await self._write(self.storage.update_expense, expense_id, update_data)
+        if expense is not None:
+            await self._publish("updated", expense=expense_to_dict(expense))
+        return expense
+
+    async def delete_expense(self, expense_id: str) -> bool:
+        """Delete an expense"""
+        deleted = await self._write(self.storage.delete_expense, expense_id)
+        if deleted:
+            await self._publish("deleted", id=expense_id)
+        return deleted
+
+    async def get_summary(self) -> ExpenseSummary:
+        """Get expense summary statistics"""
+        return await self.run(self.storage.get_summary)
+
+    async def export_to_csv(self) -> str:
+        """Export expenses to CSV format"""
+        return await self.run(self.storage.export_to_csv)
+
+    async def iter_csv(self, filters: Optional[ExpenseFilter] = None, chunk_size: int = 1000) -> AsyncIterator[str]:
+        """Stream filtered expenses as CSV text chunks, rendering each chunk in the thread pool"""
+        chunks = self.storage.iter_csv(filters, chunk_size)
+        while True:
+            chunk = await self.run(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def compact(self):
+        """Compact the underlying storage"""
+        await self._write(self.storage.compact)
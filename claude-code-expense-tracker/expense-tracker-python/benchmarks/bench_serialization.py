@@ -0,0 +1,116 @@
+"""Compare snapshot save/load times and file sizes across serialization formats.
+
+Usage (from expense-tracker-python/):
+
+    python benchmarks/bench_serialization.py [--sizes 10000 100000 1000000] [--output results.json]
+
+"legacy" is the format as it was before serializers.py existed: rows built
+with ``Expense.dict()`` plus isoformat, ``json.dumps(indent=2)`` and
+``json.load``. The other formats are timed on rows already in their
+persisted dict form. Saves are split into encoding and a plain file write;
+fsync is left out because its cost depends on the disk, not the format.
+
+"load s" decodes every row into its dict form. For binary snapshots,
+"columns s" is the decode the columnar store uses instead: straight into
+cent, epoch and category arrays, without per-row objects other than the
+descriptions.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import synthetic_rows, write_results
+from models import Expense
+from serializers import SERIALIZERS
+
+
+def legacy_to_dict(expense: Expense) -> dict:
+    data = expense.dict()
+    data['category'] = expense.category.value
+    data['date'] = data['date'].isoformat()
+    data['created_at'] = data['created_at'].isoformat()
+    return data
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def write_file(path: str, content: bytes) -> None:
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def bench_legacy(rows, path: str, model_sample: int = 10000) -> dict:
+    # Model -> dict conversion is measured on a sample and scaled, so 1M models need not fit in memory
+    sample = [Expense(**data) for _, data in rows[:model_sample]]
+    convert_time, _ = timed(lambda: [legacy_to_dict(expense) for expense in sample])
+    convert_time *= len(rows) / len(sample)
+
+    encode_time, content = timed(lambda: json.dumps(dict(rows), indent=2).encode())
+    write_time, _ = timed(lambda: write_file(path, content))
+
+    def load():
+        with open(path, 'r') as f:
+            return len(json.load(f))
+
+    load_time, loaded = timed(load)
+    assert loaded == len(rows)
+    return {
+        "encode_s": convert_time + encode_time,
+        "write_s": write_time,
+        "load_s": load_time,
+        "bytes": os.path.getsize(path),
+    }
+
+
+def bench_serializer(serializer, rows, path: str) -> dict:
+    encode_time, content = timed(lambda: serializer.dumps(iter(rows)))
+    write_time, _ = timed(lambda: write_file(path, content))
+    load_time, loaded = timed(lambda: sum(1 for _ in serializer.load(path)))
+    assert loaded == len(rows)
+    result = {"encode_s": encode_time, "write_s": write_time, "load_s": load_time, "bytes": os.path.getsize(path)}
+    if hasattr(serializer, "load_columns"):
+        columns_time, (columns, extras) = timed(lambda: serializer.load_columns(path))
+        assert len(columns.descriptions) + len(extras) == len(rows)
+        result["load_columns_s"] = columns_time
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            rows = synthetic_rows(size)
+            runs = {"legacy": bench_legacy(rows, os.path.join(tmp, f"legacy-{size}.json"))}
+            for name, serializer in SERIALIZERS.items():
+                path = os.path.join(tmp, f"{name}-{size}.snapshot")
+                runs[name] = bench_serializer(serializer, rows, path)
+                os.remove(path)
+
+            print(f"\n{size:,} rows")
+            print(f"{'format':<8} {'encode s':>9} {'write s':>9} {'load s':>9} {'columns s':>9} {'size MB':>9}")
+            for name, run in runs.items():
+                columns = f"{run['load_columns_s']:>9.3f}" if "load_columns_s" in run else f"{'-':>9}"
+                print(
+                    f"{name:<8} {run['encode_s']:>9.3f} {run['write_s']:>9.3f} "
+                    f"{run['load_s']:>9.3f} {columns} {run['bytes'] / 1e6:>9.1f}"
+                )
+                results.append({"rows": size, "format": name, **run})
+
+    if args.output:
+        write_results(args.output, "serialization", {"sizes": args.sizes}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Micro-benchmarks for the storage backends over synthetic ledgers.
+
+Usage (from expense-tracker-python/):
+
+    python benchmarks/bench_storage.py [--sizes 1000 10000 100000] [--backends json sqlite] [--output results.json]
+
+For every ledger size and backend this times the cold load, create_expense
+(each call waits until the write is durable), get_all_expenses with each
+filter, get_summary and export_to_csv. Ledgers are generated in a temporary
+directory and cover every ExpenseCategory.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import measure, write_ledger, write_results
+from models import ExpenseCategory, ExpenseCreate, ExpenseFilter
+from sqlite_storage import SqliteExpenseStorage
+from storage import ExpenseStorage
+
+
+def open_storage(backend: str, directory: str):
+    json_file = os.path.join(directory, "expenses.json")
+    if backend == "sqlite":
+        return SqliteExpenseStorage(os.path.join(directory, "expenses.db"), json_file=json_file)
+    return ExpenseStorage(
+        json_file,
+        columnar=backend == "columnar",
+        fast_start=backend == "fast-start",
+    )
+
+
+def read_benchmarks(storage, size: int):
+    """(name, callable, repeat) for every read operation"""
+    now = datetime.now()
+    # Whole scans get fewer repetitions on large ledgers
+    scan_repeat = max(3, min(50, 1_000_000 // max(size, 1)))
+    filters = {
+        "none": None,
+        "category": ExpenseFilter(category=ExpenseCategory.FOOD),
+        "date_range": ExpenseFilter(start_date=now - timedelta(days=30), end_date=now),
+        "search_short": ExpenseFilter(search_term="#1"),
+        "search": ExpenseFilter(search_term="coffee"),
+        "combined": ExpenseFilter(
+            category=ExpenseCategory.FOOD, start_date=now - timedelta(days=365), search_term="lunch"
+        ),
+    }
+    benchmarks = [
+        (f"get_all_expenses[{name}]", lambda f=f: storage.get_all_expenses(f), scan_repeat)
+        for name, f in filters.items()
+    ]
+    benchmarks += [
+        ("get_expenses_page[limit=50]", lambda: storage.get_expenses_page(limit=50), 200),
+        ("get_summary", storage.get_summary, 200),
+        ("export_to_csv", storage.export_to_csv, max(3, scan_repeat // 5)),
+    ]
+    return benchmarks
+
+
+def bench(backend: str, size: int, creates: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        write_ledger(os.path.join(tmp, "expenses.json"), size)
+
+        start = time.perf_counter()
+        storage = open_storage(backend, tmp)
+        load_s = time.perf_counter() - start
+        results.append({"backend": backend, "rows": size, "operation": "load", "total_ms": load_s * 1000})
+        print(f"  load{'':<30} {load_s * 1000:>10.1f} ms")
+
+        for name, fn, repeat in read_benchmarks(storage, size):
+            stats = measure(fn, repeat)
+            results.append({"backend": backend, "rows": size, "operation": name, **stats})
+            print(f"  {name:<34} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms")
+
+        expense = ExpenseCreate(amount=12.5, description="Benchmark coffee", category=ExpenseCategory.FOOD,
+                                date=datetime.now())
+        stats = measure(lambda: storage.create_expense(expense), creates)
+        results.append({"backend": backend, "rows": size, "operation": "create_expense", **stats})
+        print(f"  {'create_expense':<34} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--backends", nargs="+", default=["json", "sqlite"],
+                        choices=["json", "columnar", "fast-start", "sqlite"])
+    parser.add_argument("--creates", type=int, default=100, help="Number of create_expense calls to time")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            print(f"\n{backend}, {size:,} rows")
+            results += bench(backend, size, args.creates)
+
+    if args.output:
+        config = {"sizes": args.sizes, "backends": args.backends, "creates": args.creates}
+        write_results(args.output, "storage", config, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Shared helpers for the benchmarks: synthetic ledgers, timing statistics and JSON results"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from models import ExpenseCategory  # noqa: E402
+from serializers import get_serializer  # noqa: E402
+
+
+DESCRIPTIONS = [
+    "Coffee", "Groceries", "Uber ride", "Electricity bill", "Movie tickets",
+    "Lunch with team", "Gym membership", "Book store", "Train ticket", "Pharmacy",
+]
+
+CATEGORIES = [category.value for category in ExpenseCategory]
+
+# Synthetic ledgers span this many days, ending today
+LEDGER_DAYS = 3 * 365
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Tuple[str, dict]]:
+    """Build ``count`` persisted expense rows spread over every category and the last few years"""
+    rng = random.Random(seed)
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=LEDGER_DAYS)
+    rows = []
+    for i in range(count):
+        expense_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        moment = start + timedelta(seconds=rng.randint(0, LEDGER_DAYS * 86400))
+        rows.append((expense_id, {
+            "amount": rng.randint(100, 50000) / 100,
+            "description": f"{rng.choice(DESCRIPTIONS)} #{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "date": moment.isoformat(),
+            "id": expense_id,
+            "created_at": moment.isoformat(),
+        }))
+    return rows
+
+
+def write_ledger(path: str, count: int, snapshot_format: str = "json", seed: int = 42):
+    """Write a synthetic snapshot that ExpenseStorage (or the SQLite migration) can load"""
+    with open(path, 'wb') as f:
+        f.write(get_serializer(snapshot_format).dumps(synthetic_rows(count, seed)))
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency statistics in milliseconds for samples given in seconds"""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Call ``fn`` ``repeat`` times and summarize the per-call latency"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def environment() -> Dict[str, str]:
+    """Identify the code and machine a result came from, so runs can be compared across commits"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def write_results(path: str, benchmark: str, config: dict, results: list):
+    """Write results with their environment as JSON"""
+    with open(path, 'w') as f:
+        json.dump({"benchmark": benchmark, "environment": environment(), "config": config, "results": results}, f, indent=2)
+    print(f"\nResults written to {path}")
@@ -0,0 +1,174 @@
+"""Concurrent HTTP load test against the FastAPI app.
+
+Usage (from expense-tracker-python/):
+
+    python benchmarks/load_test.py [--rows 10000] [--concurrency 32] [--duration 10] [--output results.json]
+
+Unless ``--url`` points at a running server, a uvicorn server is started on
+a free local port in a temporary directory seeded with a synthetic ledger;
+the storage environment variables (EXPENSE_STORAGE, EXPENSE_COLUMNAR, ...)
+are passed through. Workers issue a weighted mix of reads and writes and
+the p50/p95/p99 latency is reported per endpoint. Requires httpx.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from common import CATEGORIES, ROOT, summarize, write_ledger, write_results
+
+
+# (name, weight, method, path, params or JSON body)
+WORKLOAD = [
+    ("list_page", 30, "GET", "/api/expenses", {"limit": 50}),
+    ("list_category", 15, "GET", "/api/expenses", {"category": "Food", "limit": 50}),
+    ("list_search", 15, "GET", "/api/expenses", {"search_term": "coffee", "limit": 50}),
+    ("search", 10, "GET", "/api/expenses/search", {"q": "lun"}),
+    ("summary", 20, "GET", "/api/summary", None),
+    ("create", 10, "POST", "/api/expenses", None),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(rows: int, workdir: str):
+    """Run the API with uvicorn in ``workdir`` and yield its base URL"""
+    write_ledger(os.path.join(workdir, "expenses.json"), rows)
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            try:
+                httpx.get(url + "/", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def request_args(name: str, params: Optional[dict], rng: random.Random) -> dict:
+    if name == "create":
+        return {"json": {
+            "amount": rng.randint(100, 50000) / 100,
+            "description": "Load test coffee",
+            "category": rng.choice(CATEGORIES),
+            "date": datetime.now().isoformat(),
+        }}
+    return {"params": params} if params else {}
+
+
+async def worker(client: httpx.AsyncClient, deadline: float, seed: int,
+                 latencies: Dict[str, List[float]], errors: Dict[str, int]):
+    rng = random.Random(seed)
+    weights = [weight for _, weight, _, _, _ in WORKLOAD]
+    while time.perf_counter() < deadline:
+        name, _, method, path, params = rng.choices(WORKLOAD, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **request_args(name, params, rng))
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        latencies[name].append(time.perf_counter() - start)
+        if failed:
+            errors[name] += 1
+
+
+async def run_load(url: str, concurrency: int, duration: float, warmup: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        if warmup:
+            await asyncio.gather(*(
+                worker(client, time.perf_counter() + warmup, -i, defaultdict(list), defaultdict(int))
+                for i in range(concurrency)
+            ))
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, start + duration, i, latencies, errors) for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "elapsed_s": elapsed,
+        "requests": len(everything),
+        "requests_per_s": len(everything) / elapsed,
+        "overall": {**summarize(everything), "errors": sum(errors.values())},
+        "endpoints": {
+            name: {**summarize(samples), "errors": errors[name]}
+            for name, samples in sorted(latencies.items())
+        },
+    }
+
+
+def report(result: dict):
+    print(f"\n{result['requests']:,} requests in {result['elapsed_s']:.1f}s "
+          f"({result['requests_per_s']:.0f} req/s)")
+    print(f"{'endpoint':<15} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    rows = list(result["endpoints"].items()) + [("overall", result["overall"])]
+    for name, stats in rows:
+        print(f"{name:<15} {stats['count']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--rows", type=int, default=10_000, help="Ledger size for the local server")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.url:
+        result = asyncio.run(run_load(args.url, args.concurrency, args.duration, args.warmup))
+    else:
+        with tempfile.TemporaryDirectory() as tmp, local_server(args.rows, tmp) as url:
+            result = asyncio.run(run_load(url, args.concurrency, args.duration, args.warmup))
+    report(result)
+
+    if args.output:
+        config = {
+            "url": args.url, "rows": None if args.url else args.rows, "concurrency": args.concurrency,
+            "duration": args.duration, "workload": [(name, weight) for name, weight, _, _, _ in WORKLOAD],
+            "storage": {key: value for key, value in os.environ.items() if key.startswith("EXPENSE_")},
+        }
+        write_results(args.output, "load_test", config, [result])
+
+
+if __name__ == "__main__":
+    main()
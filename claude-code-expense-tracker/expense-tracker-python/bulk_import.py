@@ -0,0 +1,243 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import Any, Deque, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from models import BulkImportError, ExpenseCreate
+
+
+# Error details kept in a bulk import response; further failures are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Request body bytes parsed and validated per thread pool call
+IMPORT_BATCH_BYTES = 256 * 1024
+
+# CSV header names accepted for each ExpenseCreate field (matches the CSV export)
+CSV_COLUMNS = {
+    "date": "date",
+    "description": "description",
+    "category": "category",
+    "amount": "amount",
+}
+
+
+class JsonArrayParser:
+    """Incremental parser yielding (row number, record) pairs from a JSON array"""
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.row = 0
+        self.state = "start"
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, Any]]:
+        """Parse the complete elements in ``text``, keeping a partial one for the next call"""
+        buffer = self.buffer + text
+        rows = []
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            if self.state == "start":
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of expenses")
+                self.state = "first"
+                pos += 1
+            elif self.state == "end":
+                raise ValueError("Invalid JSON: extra data after the array")
+            elif self.state == "separator":
+                if buffer[pos] not in ",]":
+                    raise ValueError(f"Invalid JSON: expected ',' or ']' after row {self.row}")
+                self.state = "value" if buffer[pos] == "," else "end"
+                pos += 1
+            elif self.state == "first" and buffer[pos] == "]":
+                self.state = "end"
+                pos += 1
+            else:
+                try:
+                    record, end = self.decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Invalid JSON: {e.msg}")
+                    break
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and not final:
+                    break
+                self.row += 1
+                rows.append((self.row, record))
+                self.state = "separator"
+                pos = end
+
+        self.buffer = buffer[pos:]
+        if final and self.state != "end":
+            raise ValueError("Expected a JSON array of expenses" if self.state == "start" else "Invalid JSON: unexpected end of data")
+        return rows
+
+
+class NdjsonParser:
+    """Incremental parser yielding (line number, record) pairs from newline-delimited JSON, skipping blank lines"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.line = 0
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, Any]]:
+        """Parse the complete lines in ``text``, keeping a partial last line for the next call"""
+        lines = (self.buffer + text).split("\n")
+        self.buffer = "" if final else lines.pop()
+        rows = []
+        for line in lines:
+            self.line += 1
+            if not line.strip():
+                continue
+            try:
+                rows.append((self.line, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((self.line, ValueError(f"Invalid JSON: {e.msg}")))
+        return rows
+
+
+class _NeedMoreInput(Exception):
+    """Raised through csv.reader when the lines received so far end inside a record"""
+
+
+class _LineFeed:
+    """Line iterator for csv.reader over the lines received so far.
+
+    Lines read for a record are remembered, so a record cut off by the end
+    of a chunk can be given back and read again once more input arrives.
+    """
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+        self.taken: List[str] = []
+        self.final = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            if self.final:
+                raise StopIteration
+            raise _NeedMoreInput
+        line = self.lines.popleft()
+        self.taken.append(line)
+        return line
+
+    def rewind(self):
+        self.lines.extendleft(reversed(self.taken))
+        self.taken = []
+
+
+class CsvParser:
+    """Incremental parser yielding (line number, record) pairs from CSV with a Date,Description,Category,Amount header.
+
+    Rows are numbered by the input line they start on, so the header is line 1.
+    A row the csv module rejects is reported as an error for that row.
+    """
+
+    def __init__(self):
+        self.partial = ""
+        self.line = 1
+        self.feed_lines = _LineFeed()
+        self.reader = csv.reader(self.feed_lines)
+        self.fields: Optional[List[Optional[str]]] = None
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[int, Any]]:
+        """Parse the complete records in ``text``, keeping a partial one for the next call"""
+        lines = (self.partial + text).split("\n")
+        self.partial = "" if final else lines.pop()
+        # csv.reader needs the line breaks to keep them inside quoted fields
+        self.feed_lines.lines.extend(line + "\n" for line in lines[:-1])
+        if lines:
+            self.feed_lines.lines.append(lines[-1] if final else lines[-1] + "\n")
+        self.feed_lines.final = final
+
+        rows = []
+        while True:
+            self.feed_lines.taken = []
+            try:
+                values = next(self.reader)
+            except _NeedMoreInput:
+                self.feed_lines.rewind()
+                break
+            except StopIteration:
+                break
+            except csv.Error as e:
+                rows.append((self.line, ValueError(f"Invalid CSV: {e}")))
+                self.line += len(self.feed_lines.taken)
+                continue
+
+            line = self.line
+            self.line += len(self.feed_lines.taken)
+            if not any(value.strip() for value in values):
+                continue
+            if self.fields is None:
+                self.fields = self.header_fields(values)
+                continue
+            rows.append((line, {field: value for field, value in zip(self.fields, values) if field}))
+        return rows
+
+    @staticmethod
+    def header_fields(header: List[str]) -> List[Optional[str]]:
+        fields = [CSV_COLUMNS.get(name.strip().lower()) for name in header]
+        missing = set(CSV_COLUMNS.values()) - set(fields)
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+        return fields
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic validation error into one line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+        for e in error.errors()
+    )
+
+
+def row_parser(content_type: str):
+    """Pick the record parser for a request content type"""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return NdjsonParser()
+    if media_type in ("text/csv", "application/csv"):
+        return CsvParser()
+    return JsonArrayParser()
+
+
+class BulkImport:
+    """Parses and validates a bulk import body fed in chunks, so it is never held whole"""
+
+    def __init__(self, content_type: str):
+        self.parser = row_parser(content_type)
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.valid: List[ExpenseCreate] = []
+        self.errors: List[BulkImportError] = []
+        self.failed = 0
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """Parse and validate the records completed by ``data``"""
+        self.validate(self.parser.feed(self.decoder.decode(data, final), final))
+
+    def validate(self, rows: Iterable[Tuple[int, Any]]) -> None:
+        for row, record in rows:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Expected an object")
+                self.valid.append(ExpenseCreate(**record))
+                continue
+            except ValidationError as e:
+                detail = format_validation_error(e)
+            except ValueError as e:
+                detail = str(e)
+
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(BulkImportError(row=row, detail=detail))
@@ -0,0 +1,312 @@
+import bisect
+import sys
+import uuid
+from array import array
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from models import Expense, ExpenseCategory
+
+
+CATEGORIES: List[ExpenseCategory] = list(ExpenseCategory)
+CATEGORY_CODES: Dict[ExpenseCategory, int] = {category: code for code, category in enumerate(CATEGORIES)}
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(value: datetime) -> int:
+    """Convert a naive datetime to microseconds since the epoch"""
+    return (value - EPOCH) // MICROSECOND
+
+
+def wall_clock_us(value: datetime) -> int:
+    """Convert a datetime's wall-clock time to microseconds since the epoch, ignoring any timezone"""
+    return to_epoch_us(value if value.tzinfo is None else value.replace(tzinfo=None))
+
+
+def from_epoch_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+# (amount cents, date epoch microseconds, category codes) for every expense
+Columns = Tuple[array, array, array]
+
+
+class RowColumns(NamedTuple):
+    """Whole rows decoded straight into column values (see BinarySerializer.load_columns)"""
+    ids: bytes  # 16-byte UUIDs
+    amount_cents: array
+    dates: array  # epoch microseconds
+    created_at: array  # epoch microseconds
+    categories: array  # CATEGORIES codes
+    descriptions: List[str]
+
+
+def build_columns(expenses: Iterable[Expense]) -> Columns:
+    """Extract analytics columns from expense models; aware dates use their wall-clock time"""
+    cents, dates, categories = array('q'), array('q'), array('b')
+    for expense in expenses:
+        cents.append(round(expense.amount * 100))
+        dates.append(wall_clock_us(expense.date))
+        categories.append(CATEGORY_CODES[ExpenseCategory(expense.category)])
+    return cents, dates, categories
+
+
+def column_models(columns: RowColumns) -> Iterator[Expense]:
+    """Build the models of rows decoded into columns; they were validated when saved, so are not validated again"""
+    # Hex-encode all ids at once; formatting slices is much cheaper than uuid.UUID per row
+    ids = columns.ids.hex()
+    for row, description in enumerate(columns.descriptions):
+        h = ids[row * 32:row * 32 + 32]
+        yield Expense.model_construct(
+            id=f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}",
+            amount=columns.amount_cents[row] / 100,
+            description=description,
+            category=CATEGORIES[columns.categories[row]],
+            date=from_epoch_us(columns.dates[row]),
+            created_at=from_epoch_us(columns.created_at[row]),
+        )
+
+
+class ColumnarExpenses(MutableMapping):
+    """Dict-like expense store that keeps rows in compact columns.
+
+    Amounts are integer cents in ``array('q')``, dates are epoch microseconds,
+    categories are one-byte codes and ids are 16-byte UUIDs, so a row costs
+    a small fraction of a pydantic model. ``Expense`` objects are only built
+    when a row is read.
+
+    Rows are numbered densely: deleting one moves the last row into its slot,
+    so indexes kept by row number (see ``ExpenseStorage``) check
+    ``row_count`` before a delete and follow the moved row. Ids map to rows
+    through a sorted array of the UUIDs' high 64 bits and a parallel array of
+    rows, so no Python object is kept per row beyond its description. Rows
+    that do not fit the layout (non-UUID ids or timezone-aware dates) still
+    get a row, with wall-clock dates in the columns, but their models are
+    kept aside and their ids looked up in a dict.
+
+    Reads return fresh models: changing one does not change the store until
+    it is assigned back.
+    """
+
+    def __init__(self):
+        self.ids = bytearray()
+        self.amount_cents = array('q')
+        self.dates = array('q')
+        self.created_at = array('q')
+        self.categories = array('b')
+        self.descriptions: List[str] = []
+        # High 64 bits of every fitting row's id, sorted, and the row holding each
+        self._id_keys = array('Q')
+        self._id_rows = array('I')
+        # Models of the rows that do not fit the layout, and their rows by id
+        self._overflow: Dict[int, Expense] = {}
+        self._overflow_rows: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(expense_id: str):
+        """Return the 16-byte key for canonical UUID ids, or None"""
+        # Checked by hand: this runs for every lookup, and uuid.UUID is several times slower
+        if (not isinstance(expense_id, str) or len(expense_id) != 36 or expense_id[8] != '-'
+                or expense_id[13] != '-' or expense_id[18] != '-' or expense_id[23] != '-'):
+            return None
+        digits = expense_id.replace('-', '')
+        if len(digits) != 32 or digits != digits.lower():
+            return None
+        try:
+            key = bytes.fromhex(digits)
+        except ValueError:
+            return None
+        return key if len(key) == 16 else None
+
+    def _find(self, key: bytes) -> int:
+        """Position of ``key`` in the id lookup arrays, or -1"""
+        high = int.from_bytes(key[:8], "big")
+        i = bisect.bisect_left(self._id_keys, high)
+        while i < len(self._id_keys) and self._id_keys[i] == high:
+            row = self._id_rows[i]
+            if self.ids[row * 16:row * 16 + 16] == key:
+                return i
+            i += 1
+        return -1
+
+    def _link(self, key: bytes, row: int):
+        high = int.from_bytes(key[:8], "big")
+        i = bisect.bisect_right(self._id_keys, high)
+        self._id_keys.insert(i, high)
+        self._id_rows.insert(i, row)
+
+    def _unlink(self, row: int):
+        """Drop a row from the id lookups"""
+        expense = self._overflow.pop(row, None)
+        if expense is not None:
+            del self._overflow_rows[expense.id]
+            return
+        i = self._find(bytes(self.ids[row * 16:row * 16 + 16]))
+        del self._id_keys[i]
+        del self._id_rows[i]
+
+    @staticmethod
+    def _fits(expense: Expense) -> bool:
+        return expense.date.tzinfo is None and expense.created_at.tzinfo is None
+
+    @property
+    def row_count(self) -> int:
+        return len(self.descriptions)
+
+    def row_of(self, expense_id: str) -> Optional[int]:
+        """The row holding an expense, or None"""
+        return self._row_of(expense_id, self._key(expense_id))
+
+    def _row_of(self, expense_id: str, key: Optional[bytes]) -> Optional[int]:
+        if key is not None:
+            i = self._find(key)
+            if i >= 0:
+                return self._id_rows[i]
+        return self._overflow_rows.get(expense_id)
+
+    def id_of(self, row: int) -> str:
+        if self._overflow and row in self._overflow:
+            return self._overflow[row].id
+        digits = self.ids[row * 16:row * 16 + 16].hex()
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def expense_at(self, row: int) -> Expense:
+        if self._overflow and row in self._overflow:
+            return self._overflow[row]
+        return Expense.model_construct(
+            id=self.id_of(row),
+            amount=self.amount_cents[row] / 100,
+            description=self.descriptions[row],
+            category=CATEGORIES[self.categories[row]],
+            date=from_epoch_us(self.dates[row]),
+            created_at=from_epoch_us(self.created_at[row]),
+        )
+
+    def __getitem__(self, expense_id: str) -> Expense:
+        row = self.row_of(expense_id)
+        if row is None:
+            raise KeyError(expense_id)
+        return self.expense_at(row)
+
+    def __setitem__(self, expense_id: str, expense: Expense):
+        self.put(expense_id, expense)
+
+    def put(self, expense_id: str, expense: Expense, new: bool = False) -> int:
+        """Store an expense and return its row; ``new`` skips the lookup for ids known to be absent"""
+        key = self._key(expense_id)
+        fits = key is not None and self._fits(expense)
+        values = (
+            round(expense.amount * 100),
+            wall_clock_us(expense.date),
+            wall_clock_us(expense.created_at),
+            CATEGORY_CODES[ExpenseCategory(expense.category)],
+        )
+
+        row = None if new else self._row_of(expense_id, key)
+        if row is None:
+            row = len(self.descriptions)
+            self.ids += bytes(16)
+            self.amount_cents.append(values[0])
+            self.dates.append(values[1])
+            self.created_at.append(values[2])
+            self.categories.append(values[3])
+            self.descriptions.append(expense.description)
+        else:
+            # Updates keep the row number, even when the row moves in or out of the overflow
+            self._unlink(row)
+            self.amount_cents[row], self.dates[row], self.created_at[row], self.categories[row] = values
+            self.descriptions[row] = expense.description
+
+        if fits:
+            self.ids[row * 16:row * 16 + 16] = key
+            self._link(key, row)
+        else:
+            self.ids[row * 16:row * 16 + 16] = bytes(16)
+            self._overflow[row] = expense
+            self._overflow_rows[expense_id] = row
+        return row
+
+    def extend(self, columns: RowColumns) -> range:
+        """Append rows with new, canonical UUID ids and naive dates; returns their row numbers"""
+        first = len(self.descriptions)
+        count = len(columns.descriptions)
+        self.ids += columns.ids
+        self.amount_cents.extend(columns.amount_cents)
+        self.dates.extend(columns.dates)
+        self.created_at.extend(columns.created_at)
+        self.categories.extend(columns.categories)
+        self.descriptions.extend(columns.descriptions)
+
+        # The high 64 bits of each id, read as big-endian integers
+        keys = array('Q', memoryview(columns.ids).cast('Q')[::2])
+        if sys.byteorder == "little":
+            keys.byteswap()
+        if self._id_keys:
+            for i in range(count):
+                self._link(columns.ids[i * 16:i * 16 + 16], first + i)
+        else:
+            # Sort the lookup once instead of inserting every key
+            order = sorted(range(count), key=keys.__getitem__)
+            self._id_keys = array('Q', (keys[i] for i in order))
+            self._id_rows = array('I', (first + i for i in order))
+        return range(first, first + count)
+
+    def __delitem__(self, expense_id: str):
+        row = self.row_of(expense_id)
+        if row is None:
+            raise KeyError(expense_id)
+        self._unlink(row)
+
+        # Move the last row into the freed slot so the columns stay dense
+        last = len(self.descriptions) - 1
+        if row != last:
+            expense = self._overflow.pop(last, None)
+            if expense is not None:
+                self._overflow[row] = expense
+                self._overflow_rows[expense.id] = row
+            else:
+                self._id_rows[self._find(bytes(self.ids[last * 16:]))] = row
+            self.ids[row * 16:row * 16 + 16] = self.ids[last * 16:]
+            self.amount_cents[row] = self.amount_cents[last]
+            self.dates[row] = self.dates[last]
+            self.created_at[row] = self.created_at[last]
+            self.categories[row] = self.categories[last]
+            self.descriptions[row] = self.descriptions[last]
+
+        del self.ids[last * 16:]
+        self.amount_cents.pop()
+        self.dates.pop()
+        self.created_at.pop()
+        self.categories.pop()
+        self.descriptions.pop()
+
+    def __contains__(self, expense_id) -> bool:
+        return self.row_of(expense_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self.descriptions)):
+            yield self.id_of(row)
+
+    def __len__(self) -> int:
+        return len(self.descriptions)
+
+    def columns(self) -> Columns:
+        """Copy the analytics columns"""
+        return array('q', self.amount_cents), array('q', self.dates), array('b', self.categories)
+
+    def copy(self) -> "ColumnarExpenses":
+        """Copy the columns (cheap buffer copies, no models are built)"""
+        clone = ColumnarExpenses()
+        clone.ids = bytearray(self.ids)
+        clone.amount_cents = array('q', self.amount_cents)
+        clone.dates = array('q', self.dates)
+        clone.created_at = array('q', self.created_at)
+        clone.categories = array('b', self.categories)
+        clone.descriptions = list(self.descriptions)
+        clone._id_keys = array('Q', self._id_keys)
+        clone._id_rows = array('I', self._id_rows)
+        clone._overflow = dict(self._overflow)
+        clone._overflow_rows = dict(self._overflow_rows)
+        return clone
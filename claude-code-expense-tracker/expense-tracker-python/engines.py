@@ -0,0 +1,267 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from models import Expense
+from serializers import Row, detect_serializer, get_serializer
+from metrics import STORAGE_SAVE_SECONDS, STORAGE_WRITE_BYTES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Whether engines can coordinate several processes sharing the same files (see SnapshotEngine.lock)
+FILE_LOCKING = fcntl is not None
+
+
+# A single mutation as seen by an engine: (op, expense_id, serialized expense).
+# ``op`` is "put" or "delete"; the data is None for deletes. Loads asked for columns
+# may also yield ("columns", None, RowColumns) for a block of snapshot rows.
+Change = Tuple[str, Optional[str], Any]
+
+# Returns a consistent copy of the in-memory expenses, for engines that rewrite a snapshot
+Snapshot = Callable[[], Dict[str, Expense]]
+
+
+def expense_to_dict(expense: Expense) -> dict:
+    """Serialize an expense into a JSON-compatible dict"""
+    # Built by hand (in field order) rather than with .dict(), which is several times slower
+    return {
+        'amount': expense.amount,
+        'description': expense.description,
+        'category': expense.category.value,
+        'date': expense.date.isoformat(),
+        'id': expense.id,
+        'created_at': expense.created_at.isoformat(),
+    }
+
+
+def write_file_atomic(path: str, content: Union[str, bytes]):
+    """Write a file via a temporary sibling and os.replace so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+
+def fsync_directory(path: str):
+    """Make a rename inside the file's directory durable (not supported on Windows)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SnapshotEngine:
+    """Persist expenses by rewriting the whole snapshot on every save.
+
+    The snapshot is written by ``serializer`` (see serializers.py) and read
+    back by whichever serializer matches the file, so switching formats only
+    takes effect at the next rewrite and never strands existing data.
+    """
+
+    def __init__(self, data_file: str = "expenses.json", serializer=None):
+        self.data_file = data_file
+        self.serializer = serializer or get_serializer("json")
+        self.lock_file = f"{data_file}.lock"
+        # Identity of the snapshot file as last loaded or written, to notice replacements by other processes
+        self.snapshot_id: Optional[Tuple[int, int]] = None
+
+    def _snapshot_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        # Snapshots are replaced with os.replace, which gives the file a new inode
+        return stat.st_ino, stat.st_mtime_ns
+
+    @contextmanager
+    def lock(self, shared: bool = False):
+        """Hold an advisory lock on the data files across processes (and threads).
+
+        Writers take it exclusively; readers catching up with other processes'
+        changes take it shared. Each call locks through its own file
+        descriptor, since flock locks belong to the open file.
+        """
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def changed(self) -> bool:
+        """Whether the files changed since they were last loaded or written by this engine"""
+        return self._snapshot_id() != self.snapshot_id
+
+    def pending_changes(self) -> Optional[List[Change]]:
+        """Changes written by other processes since the last load or write.
+
+        Returns None when the snapshot was replaced, in which case the caller
+        must reload everything. Call it while holding ``lock``.
+        """
+        return [] if not self.changed() else None
+
+    def load(self, stream: bool = False, columns: bool = False) -> Iterator[Change]:
+        """Yield every persisted expense as a put change.
+        
+        ``stream`` decodes a JSON snapshot incrementally. With ``columns``, a
+        binary snapshot's fixed-width rows come first as one "columns" change,
+        decoded straight into column values instead of one dict per row.
+        """
+        self.snapshot_id = self._snapshot_id()
+        if not os.path.exists(self.data_file):
+            return
+        serializer = detect_serializer(self.data_file, self.serializer)
+        if columns and hasattr(serializer, "load_columns"):
+            row_columns, rows = serializer.load_columns(self.data_file)
+            yield ("columns", None, row_columns)
+        else:
+            rows = serializer.load(self.data_file, stream)
+        for expense_id, expense_data in rows:
+            yield ("put", expense_id, expense_data)
+
+    def write(self, changes: List[Change], snapshot: Snapshot):
+        """Persist a batch of changes"""
+        self.write_snapshot(snapshot())
+
+    def write_snapshot(self, expenses: Dict[str, Expense]):
+        """Rewrite the snapshot from the full in-memory state"""
+        # Lazy stores hand back rows that were never turned into models as-is
+        serialized_items = getattr(expenses, "serialized_items", None)
+        if serialized_items is not None:
+            rows: Iterable[Row] = serialized_items()
+        else:
+            rows = (
+                (expense_id, expense_to_dict(expense))
+                for expense_id, expense in expenses.items()
+            )
+        start = time.perf_counter()
+        content = self.serializer.dumps(rows)
+        write_file_atomic(self.data_file, content)
+        self.snapshot_id = self._snapshot_id()
+        STORAGE_SAVE_SECONDS.observe(time.perf_counter() - start, kind="snapshot")
+        STORAGE_WRITE_BYTES.inc(len(content), kind="snapshot")
+
+    def compact(self, expenses: Dict[str, Expense]):
+        """Snapshots are always compact"""
+        self.write_snapshot(expenses)
+
+
+class JournalEngine(SnapshotEngine):
+    """Persist expenses as a snapshot plus an append-only JSON-lines journal.
+
+    Each save appends one line per change, so a write costs O(1) I/O regardless
+    of ledger size. Once the journal holds ``compact_every`` entries it is folded
+    into a fresh snapshot and truncated. Replaying a journal entry that is
+    already part of the snapshot is harmless, so a crash between the snapshot
+    replace and the truncate loses nothing.
+    """
+
+    def __init__(self, data_file: str = "expenses.json", journal_file: Optional[str] = None,
+                 compact_every: int = 1000, fsync: bool = True, serializer=None):
+        super().__init__(data_file, serializer)
+        self.journal_file = journal_file or f"{data_file}.journal"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.journal_entries = 0
+        # Bytes of the journal already applied; anything past it was appended by another process
+        self.journal_offset = 0
+
+    def load(self, stream: bool = False, columns: bool = False) -> Iterator[Change]:
+        """Yield the snapshot followed by the journal replay"""
+        yield from super().load(stream, columns)
+        yield from self._replay_journal()
+
+    def _journal_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+    def _replay_journal(self) -> Iterator[Change]:
+        """Replay journal entries from the start"""
+        self.journal_entries = 0
+        self.journal_offset = 0
+        yield from self._read_journal()
+
+    def _read_journal(self) -> Iterator[Change]:
+        """Replay journal entries past ``journal_offset``, dropping a torn or corrupt tail left by a crash"""
+        if not os.path.exists(self.journal_file):
+            return
+
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self.journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                    change = (entry["op"], entry["id"], entry.get("expense"))
+                except (ValueError, KeyError, TypeError):
+                    break
+                self.journal_offset += len(line)
+                self.journal_entries += 1
+                yield change
+            size = f.seek(0, os.SEEK_END)
+
+        if self.journal_offset < size:
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(self.journal_offset)
+
+    def changed(self) -> bool:
+        """Whether the snapshot was replaced or the journal grew since this engine last read or wrote it"""
+        return super().changed() or self._journal_size() != self.journal_offset
+
+    def pending_changes(self) -> Optional[List[Change]]:
+        """Journal entries appended by other processes, or None after another process compacted"""
+        if super().changed() or self._journal_size() < self.journal_offset:
+            return None
+        return list(self._read_journal())
+
+    def write(self, changes: List[Change], snapshot: Snapshot):
+        """Append a batch of changes to the journal, compacting when it grows too long"""
+        if not changes:
+            return
+
+        start = time.perf_counter()
+        lines = []
+        for op, expense_id, data in changes:
+            entry = {"op": op, "id": expense_id}
+            if data is not None:
+                entry["expense"] = data
+            lines.append(json.dumps(entry) + "\n")
+
+        content = "".join(lines).encode()
+        with open(self.journal_file, 'ab') as f:
+            f.write(content)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self.journal_offset = f.tell()
+        self.journal_entries += len(changes)
+        STORAGE_SAVE_SECONDS.observe(time.perf_counter() - start, kind="journal")
+        STORAGE_WRITE_BYTES.inc(len(content), kind="journal")
+
+        if self.journal_entries >= self.compact_every:
+            self.compact(snapshot())
+
+    def compact(self, expenses: Dict[str, Expense]):
+        """Fold the journal into a new snapshot and truncate it"""
+        self.write_snapshot(expenses)
+        with open(self.journal_file, 'w'):
+            pass
+        self.journal_entries = 0
+        self.journal_offset = 0
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set, Tuple
+
+# A change notification: {"type": ..., "version": ..., plus type-specific fields}
+Event = Dict[str, Any]
+
+# Sent instead of a subscriber's backlog when it fell too far behind to catch up event by event
+RESYNC: Event = {"type": "resync"}
+
+
+class EventBus:
+    """In-process publish/subscribe for storage change events.
+
+    Every subscriber gets a bounded asyncio queue on its own event loop, and
+    ``publish`` may be called from any thread. A subscriber that falls more
+    than ``max_queue`` events behind has its backlog replaced by a single
+    ``resync`` event, telling it to refetch instead.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of subscribers"""
+        return len(self._subscribers)
+
+    def publish(self, event: Event):
+        """Deliver ``event`` to every subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                pass
+
+    def _deliver(self, queue: asyncio.Queue, event: Event):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = RESYNC
+        queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """Receive events on the yielded queue until the block exits"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+def format_sse(event: Event) -> str:
+    """Encode an event as a server-sent event, with its version as the event id"""
+    lines = [f"event: {event['type']}"]
+    if "version" in event:
+        lines.append(f"id: {event['version']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,73 @@
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, Iterator, Tuple, Union
+from models import Expense
+from engines import expense_to_dict
+
+
+class LazyExpenses(MutableMapping):
+    """Dict-like expense store that keeps persisted rows as raw dicts until they are read.
+
+    Rows loaded with ``put_raw`` have already been validated once when they
+    were first saved, so they are only turned into an ``Expense`` (and
+    validated again) the first time they are accessed; the model then
+    replaces the raw row. Startup therefore skips model construction for the
+    whole ledger, and rows that are never read never pay for it.
+
+    Not thread-safe on its own: reads replace rows, so callers serialize
+    access (ExpenseStorage does so under its instance lock).
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, Union[Expense, dict]] = {}
+
+    def put_raw(self, expense_id: str, data: dict):
+        """Store a serialized expense (as written by ``expense_to_dict``) without building a model"""
+        self._rows[expense_id] = data
+
+    def __getitem__(self, expense_id: str) -> Expense:
+        row = self._rows[expense_id]
+        if isinstance(row, dict):
+            row = self._rows[expense_id] = Expense(**row)
+        return row
+
+    def description_of(self, expense_id: str) -> str:
+        """A row's description, without building its model"""
+        row = self._rows[expense_id]
+        return row["description"] if isinstance(row, dict) else row.description
+
+    def category_of(self, expense_id: str) -> str:
+        """A row's category (its value, for raw rows), without building its model"""
+        row = self._rows[expense_id]
+        return row["category"] if isinstance(row, dict) else row.category
+
+    def date_of(self, expense_id: str) -> datetime:
+        """A row's date, without building its model"""
+        row = self._rows[expense_id]
+        return datetime.fromisoformat(row["date"]) if isinstance(row, dict) else row.date
+
+    def __setitem__(self, expense_id: str, expense: Expense):
+        self._rows[expense_id] = expense
+
+    def __delitem__(self, expense_id: str):
+        del self._rows[expense_id]
+
+    def __contains__(self, expense_id) -> bool:
+        return expense_id in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def serialized_items(self) -> Iterator[Tuple[str, dict]]:
+        """Yield every row in its persisted form, reusing raw rows instead of building models"""
+        for expense_id, row in self._rows.items():
+            yield expense_id, row if isinstance(row, dict) else expense_to_dict(row)
+
+    def copy(self) -> "LazyExpenses":
+        """Shallow copy; raw rows are never mutated, so they can be shared"""
+        clone = LazyExpenses()
+        clone._rows = dict(self._rows)
+        return clone
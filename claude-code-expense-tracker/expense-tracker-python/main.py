@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
-from nicegui import ui, app, run
+from nicegui import Client, ui, app, background_tasks
 from datetime import datetime, date, timedelta
-from typing import Optional, List
+from typing import Awaitable, Callable, Optional, List, Set, Tuple
 import asyncio
-import threading
-import uvicorn
-from contextlib import asynccontextmanager
-import requests
-import json
+import os
 
-from models import ExpenseCreate, ExpenseUpdate, ExpenseCategory
-from storage import ExpenseStorage
+from models import ExpenseCategory
+from api_client import ApiClient, ApiError, LocalExpenseClient
 
-# Initialize storage
-storage = ExpenseStorage()
+# URL of a separately running API (e.g. http://localhost:8001/api). Without it the
+# API runs in this process: its routes are served under /api by NiceGUI and the UI
+# calls the API's storage directly.
+API_URL = os.environ.get("EXPENSE_API_URL")
 
-# API base URL
-API_BASE_URL = "http://localhost:8001/api"
+def create_api_client():
+    """The client every browser session shares to reach the API"""
+    if API_URL:
+        # Pooled async HTTP client
+        return ApiClient(API_URL)
+    # Imported only here, since importing the API opens its storage
+    from api import install_middlewares, router, storage
+    install_middlewares(app)
+    app.include_router(router)
+    return LocalExpenseClient(storage)
+
+api = create_api_client()
+app.on_shutdown(api.close)
+
+# Rows per page of the expense table
+PAGE_SIZE = 25
+
+# Seconds of typing pause before the search box queries the API
+SEARCH_DEBOUNCE = 0.3
+
+# Longest wait between attempts to reconnect the event stream
+EVENTS_MAX_RETRY = 30.0
 
 # Global state
-current_expenses = []
 current_summary = None
 selected_expense_id = None
 edit_mode = False
@@ -36,42 +53,19 @@ COLORS = {
     'border': '#e2e8f0'
 }
 
-async def start_fastapi():
-    """Start FastAPI server in background"""
-    config = uvicorn.Config(
-        "api:app",
-        host="127.0.0.1",
-        port=8001,
-        log_level="warning"
-    )
-    server = uvicorn.Server(config)
-    await server.serve()
-
-def start_fastapi_thread():
-    """Start FastAPI in a separate thread"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(start_fastapi())
-
-def fetch_expenses():
-    """Fetch expenses from API"""
+async def fetch_expense_page(filters: dict, cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page of expenses from API, with the cursor of the next page"""
     try:
-        response = requests.get(f"{API_BASE_URL}/expenses")
-        if response.status_code == 200:
-            return response.json()
-        return []
-    except requests.exceptions.RequestException:
-        return storage.get_all_expenses()
+        return await api.get_expenses_page(limit, cursor, **filters)
+    except ApiError:
+        return [], None
 
-def fetch_summary():
+async def fetch_summary():
     """Fetch summary from API"""
     try:
-        response = requests.get(f"{API_BASE_URL}/summary")
-        if response.status_code == 200:
-            return response.json()
-        return storage.get_summary().dict()
-    except requests.exceptions.RequestException:
-        return storage.get_summary().dict()
+        return await api.get_summary()
+    except ApiError:
+        return {}
 
 def format_currency(amount: float) -> str:
     """Format amount as currency"""
@@ -108,26 +102,212 @@ def get_category_color(category: str) -> str:
     }
     return colors.get(category, '#6b7280')
 
-async def refresh_data():
-    """Refresh all data"""
-    global current_expenses, current_summary
-    current_expenses = fetch_expenses()
-    current_summary = fetch_summary()
+def table_row(expense: dict) -> dict:
+    """Expense as a table row, with the display values the table slots use"""
+    return {
+        **expense,
+        'date_label': format_date(expense.get('date', '')),
+        'amount_label': format_currency(expense.get('amount', 0)),
+        'color': get_category_color(expense.get('category', 'Other')),
+    }
+
+class LiveUpdates:
+    """Relays the API's change events to every open page.
+
+    One event stream serves the whole UI process. If the data version
+    moved while the stream was down, the pages are sent a ``resync``
+    event, since they missed changes.
+    """
+    
+    def __init__(self):
+        self.connected = False
+        self.version: Optional[int] = None
+        self._handlers: Set[Callable[[dict], Awaitable[None]]] = set()
+    
+    def subscribe(self, handler: Callable[[dict], Awaitable[None]]) -> Callable[[], None]:
+        """Call ``handler`` with every event; returns the function that unsubscribes it"""
+        self._handlers.add(handler)
+        return lambda: self._handlers.discard(handler)
+    
+    async def run(self):
+        """Follow the event stream, reconnecting with backoff, until cancelled"""
+        retry = 1.0
+        while True:
+            try:
+                async for event in api.events():
+                    if event['type'] == 'ready':
+                        self.connected = True
+                        retry = 1.0
+                        if self.version is not None and event['version'] != self.version:
+                            await self._dispatch({'type': 'resync'})
+                        self.version = event['version']
+                        continue
+                    await self._dispatch(event)
+            except ApiError:
+                pass
+            self.connected = False
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, EVENTS_MAX_RETRY)
+    
+    async def _dispatch(self, event: dict):
+        version = event.get('version')
+        if version is not None:
+            if self.version is not None and version < self.version:
+                # Published after a newer change; its summary is out of date
+                event = {key: value for key, value in event.items() if key != 'summary'}
+            else:
+                self.version = version
+        # Pages update concurrently; a page that fails (e.g. it is closing) does not stop the others
+        await asyncio.gather(*(handler(event) for handler in list(self._handlers)), return_exceptions=True)
+
+live_updates = LiveUpdates()
+
+def start_live_updates():
+    background_tasks.create(live_updates.run(), name='live updates')
+
+app.on_startup(start_live_updates)
+
+class ExpensePager:
+    """Server-side pagination of the expense list for one browser session.
+
+    Only the visible page is fetched. The API pages with forward-only
+    cursors, so the cursors of the pages visited so far are kept on a stack
+    to step back.
+    """
+    
+    def __init__(self, page_size: int = PAGE_SIZE):
+        self.page_size = page_size
+        self.filters: dict = {}
+        self.rows: List[dict] = []
+        self.next_cursor: Optional[str] = None
+        # Cursor of every visited page, the current one last (None is the first page)
+        self._cursors: List[Optional[str]] = [None]
+        # Filter query waiting for its debounce delay or for the API
+        self._query: Optional[asyncio.Task] = None
+    
+    @property
+    def page(self) -> int:
+        return len(self._cursors)
+    
+    @property
+    def has_previous(self) -> bool:
+        return len(self._cursors) > 1
+    
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+    
+    async def _load(self):
+        expenses, self.next_cursor = await fetch_expense_page(self.filters, self._cursors[-1], self.page_size)
+        self.rows = [table_row(expense) for expense in expenses]
+    
+    async def first(self, filters: Optional[dict] = None):
+        """Go to the first page, optionally with new filters"""
+        if filters is not None:
+            self.filters = filters
+        self._cursors = [None]
+        await self._load()
+    
+    async def next(self):
+        if self.has_next:
+            self._cursors.append(self.next_cursor)
+            await self._load()
+    
+    async def previous(self):
+        if self.has_previous:
+            self._cursors.pop()
+            await self._load()
+    
+    def query(self, filters: dict, on_loaded: Callable[[], None], delay: float = 0.0):
+        """Go to the first page with ``filters`` after ``delay`` seconds, then call ``on_loaded``.
+        
+        A newer query cancels one that is still waiting or in flight, so
+        only the latest filters reach the table.
+        """
+        if self._query is not None:
+            self._query.cancel()
+        self._query = background_tasks.create(self._run_query(filters, on_loaded, delay), name='expense query')
+    
+    async def _run_query(self, filters: dict, on_loaded: Callable[[], None], delay: float):
+        await asyncio.sleep(delay)
+        await self.first(filters)
+        on_loaded()
+    
+    async def reload(self):
+        """Fetch the current page again, e.g. after a change"""
+        await self._load()
+        if not self.rows and self.has_previous:
+            # The last row of a trailing page was deleted
+            await self.previous()
+    
+    def matches(self, expense: dict) -> bool:
+        """Whether ``expense`` passes the current filters"""
+        category = self.filters.get('category')
+        if category and expense['category'] != category:
+            return False
+        search_term = self.filters.get('search_term')
+        return not search_term or search_term.lower() in expense['description'].lower()
+    
+    def _in_range(self, expense: dict) -> bool:
+        # Rows are newest first; the first and last page are open-ended
+        if not self.rows:
+            return not self.has_previous
+        return ((not self.has_previous or expense['date'] <= self.rows[0]['date']) and
+                (not self.has_next or expense['date'] >= self.rows[-1]['date']))
+    
+    async def apply(self, event: dict) -> bool:
+        """Patch the page for a change event; returns whether the rows changed.
+        
+        Edits and deletes of visible rows are patched in place. Only when a
+        row enters the page or moves within it is the page fetched again.
+        """
+        if event['type'] == 'deleted':
+            index = self._index(event['id'])
+            if index is None:
+                return False
+            del self.rows[index]
+            if not self.rows:
+                await self.reload()
+            return True
+        
+        expense = event['expense']
+        index = self._index(expense['id'])
+        if index is not None and self.matches(expense) and expense['date'] == self.rows[index]['date']:
+            self.rows[index] = table_row(expense)
+            return True
+        if index is not None or (self.matches(expense) and self._in_range(expense)):
+            await self.reload()
+            return True
+        return False
+    
+    def _index(self, expense_id: str) -> Optional[int]:
+        for index, row in enumerate(self.rows):
+            if row['id'] == expense_id:
+                return index
+        return None
+
+async def refresh_data(pager: Optional[ExpensePager] = None):
+    """Refresh the summary and, if given, the visible page of expenses"""
+    global current_summary
+    if pager is None:
+        current_summary = await fetch_summary()
+    else:
+        current_summary, _ = await asyncio.gather(fetch_summary(), pager.reload())
 
 @ui.page('/')
-async def main_page():
+async def main_page(client: Client):
     """Main application page"""
-    await refresh_data()
+    pager = ExpensePager()
+    await asyncio.gather(refresh_data(), pager.first())
     
     # Custom CSS for modern design
     ui.add_head_html('''
     <style>
-        .expense-card {
-            transition: transform 0.2s ease-in-out, box-shadow 0.2s ease-in-out;
+        .expense-table tbody tr {
+            transition: background-color 0.2s ease-in-out;
         }
-        .expense-card:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
+        .expense-table tbody tr:hover {
+            background-color: #f1f5f9;
         }
         .summary-card {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -165,23 +345,22 @@ async def main_page():
             with ui.card().classes('summary-card mb-4'):
                 with ui.card_section():
                     ui.label('Total Expenses').classes('text-sm text-white opacity-80')
-                    ui.label(format_currency(current_summary.get('total_expenses', 0))).classes('text-2xl font-bold text-white')
+                    total_label = ui.label().classes('text-2xl font-bold text-white')
             
             with ui.card().classes('mb-4'):
                 with ui.card_section():
                     ui.label('This Month').classes('text-sm text-gray-600')
-                    ui.label(format_currency(current_summary.get('monthly_expenses', 0))).classes('text-xl font-bold text-gray-800')
+                    monthly_label = ui.label().classes('text-xl font-bold text-gray-800')
             
             with ui.card().classes('mb-4'):
                 with ui.card_section():
                     ui.label('Total Count').classes('text-sm text-gray-600')
-                    ui.label(str(current_summary.get('expense_count', 0))).classes('text-xl font-bold text-gray-800')
+                    count_label = ui.label().classes('text-xl font-bold text-gray-800')
             
-            if current_summary.get('top_category'):
-                with ui.card().classes('mb-6'):
-                    with ui.card_section():
-                        ui.label('Top Category').classes('text-sm text-gray-600')
-                        ui.label(current_summary['top_category']).classes('text-lg font-bold text-gray-800')
+            with ui.card().classes('mb-6') as top_category_card:
+                with ui.card_section():
+                    ui.label('Top Category').classes('text-sm text-gray-600')
+                    top_category_label = ui.label().classes('text-lg font-bold text-gray-800')
             
             # Add Expense Form
             ui.separator().classes('my-4')
@@ -214,26 +393,23 @@ async def main_page():
                             'date': datetime.fromisoformat(date_input.value).isoformat()
                         }
                         
-                        response = requests.post(f"{API_BASE_URL}/expenses", json=expense_data)
+                        await api.create_expense(expense_data)
                         
-                        if response.status_code == 200:
-                            ui.notify('Expense added successfully!', type='positive')
-                            amount_input.value = None
-                            description_input.value = ''
-                            category_select.value = 'Other'
-                            date_input.value = date.today().strftime('%Y-%m-%d')
-                            await refresh_data()
-                            expense_list.refresh()
-                            summary_container.refresh()
-                        else:
-                            ui.notify('Failed to add expense', type='negative')
+                        ui.notify('Expense added successfully!', type='positive')
+                        amount_input.value = None
+                        description_input.value = ''
+                        category_select.value = 'Other'
+                        date_input.value = date.today().strftime('%Y-%m-%d')
+                        await after_change()
+                    except ApiError as e:
+                        ui.notify(f'Failed to add expense: {str(e)}', type='negative')
                     except Exception as e:
                         ui.notify(f'Error: {str(e)}', type='negative')
                 
                 ui.button('Add Expense', on_click=add_expense).props('color=primary').classes('w-full')
         
         # Main Content Area
-        with ui.column().classes('flex-1 main-content p-6'):
+        with ui.column().classes('flex-1 main-content p-6') as content:
             # Header
             with ui.row().classes('w-full justify-between items-center mb-6'):
                 ui.label('Recent Expenses').classes('text-2xl font-bold text-gray-800')
@@ -252,12 +428,13 @@ async def main_page():
                     
                     async def export_csv():
                         try:
-                            response = requests.get(f"{API_BASE_URL}/export/csv")
-                            if response.status_code == 200:
-                                ui.download(response.content, 'expenses.csv')
-                                ui.notify('Expenses exported successfully!', type='positive')
-                            else:
+                            ui.download(await api.export_csv(), 'expenses.csv')
+                            ui.notify('Expenses exported successfully!', type='positive')
+                        except ApiError as e:
+                            if e.status_code == 404:
                                 ui.notify('No expenses to export', type='warning')
+                            else:
+                                ui.notify(f'Export failed: {str(e)}', type='negative')
                         except Exception as e:
                             ui.notify(f'Export failed: {str(e)}', type='negative')
                     
@@ -278,62 +455,130 @@ async def main_page():
             
             summary_container()
             
-            # Expense List
-            @ui.refreshable
-            def expense_list():
-                filtered_expenses = current_expenses
-                
-                # Apply filters
-                if category_filter.value and category_filter.value != 'All':
-                    filtered_expenses = [e for e in filtered_expenses if e.get('category') == category_filter.value]
-                
-                if search_input.value:
-                    search_term = search_input.value.lower()
-                    filtered_expenses = [
-                        e for e in filtered_expenses 
-                        if search_term in e.get('description', '').lower()
-                    ]
-                
-                if not filtered_expenses:
-                    with ui.card().classes('p-8 text-center'):
-                        ui.icon('receipt_long').classes('text-6xl text-gray-400 mb-4')
-                        ui.label('No expenses found').classes('text-xl text-gray-600 mb-2')
-                        ui.label('Add your first expense using the form on the left').classes('text-gray-500')
-                else:
-                    for expense in filtered_expenses:
-                        with ui.card().classes('expense-card mb-3 p-4'):
-                            with ui.row().classes('w-full justify-between items-center'):
-                                with ui.column().classes('flex-1'):
-                                    with ui.row().classes('items-center gap-2 mb-2'):
-                                        ui.label(expense.get('description', '')).classes('text-lg font-semibold text-gray-800')
-                                        ui.html(f'''
-                                            <span class="category-badge" style="background-color: {get_category_color(expense.get('category', 'Other'))}">
-                                                {expense.get('category', 'Other')}
-                                            </span>
-                                        ''')
-                                    
-                                    with ui.row().classes('items-center gap-4 text-sm text-gray-600'):
-                                        ui.icon('schedule').classes('text-base')
-                                        ui.label(format_date(expense.get('date', '')))
-                                
-                                with ui.column().classes('items-end'):
-                                    ui.label(format_currency(expense.get('amount', 0))).classes('text-xl font-bold text-gray-800 mb-2')
-                                    
-                                    with ui.row().classes('gap-1'):
-                                        edit_btn = ui.button(icon='edit', on_click=lambda e=expense: edit_expense(e)).props('size=sm outlined color=primary')
-                                        delete_btn = ui.button(icon='delete', on_click=lambda e=expense: delete_expense(e)).props('size=sm outlined color=negative')
+            def show_summary():
+                """Patch the summary values in place"""
+                total_label.text = format_currency(current_summary.get('total_expenses', 0))
+                monthly_label.text = format_currency(current_summary.get('monthly_expenses', 0))
+                count_label.text = str(current_summary.get('expense_count', 0))
+                top_category_label.text = current_summary.get('top_category') or ''
+                top_category_card.set_visibility(bool(current_summary.get('top_category')))
+                summary_container.refresh()
+            
+            show_summary()
+            
+            # Expense List: one page at a time, fetched from the API
+            columns = [
+                {'name': 'date', 'label': 'Date', 'field': 'date_label', 'align': 'left'},
+                {'name': 'description', 'label': 'Description', 'field': 'description', 'align': 'left'},
+                {'name': 'category', 'label': 'Category', 'field': 'category', 'align': 'left'},
+                {'name': 'amount', 'label': 'Amount', 'field': 'amount_label', 'align': 'right'},
+                {'name': 'actions', 'label': '', 'field': 'id', 'align': 'right'},
+            ]
+            expense_table = ui.table(columns=columns, rows=pager.rows, row_key='id').classes('w-full expense-table')
+            expense_table.add_slot('body-cell-category', '''
+                <q-td :props="props">
+                    <span class="category-badge" :style="{backgroundColor: props.row.color}">{{ props.value }}</span>
+                </q-td>
+            ''')
+            expense_table.add_slot('body-cell-amount', '''
+                <q-td :props="props" class="text-base font-bold text-gray-800">{{ props.value }}</q-td>
+            ''')
+            expense_table.add_slot('body-cell-actions', '''
+                <q-td :props="props" auto-width>
+                    <q-btn size="sm" outline color="primary" icon="edit" class="q-mr-xs"
+                           @click="() => $parent.$emit('edit', props.row)" />
+                    <q-btn size="sm" outline color="negative" icon="delete"
+                           @click="() => $parent.$emit('delete', props.row)" />
+                </q-td>
+            ''')
+            expense_table.add_slot('no-data', '''
+                <div class="full-width column items-center q-pa-lg text-grey-7">
+                    <q-icon name="receipt_long" size="4rem" class="q-mb-md" />
+                    <div class="text-h6">No expenses found</div>
+                    <div>Add your first expense using the form on the left</div>
+                </div>
+            ''')
             
-            expense_list()
+            with ui.row().classes('w-full justify-end items-center gap-2'):
+                previous_button = ui.button(icon='chevron_left').props('flat round')
+                page_label = ui.label().classes('text-sm text-gray-600')
+                next_button = ui.button(icon='chevron_right').props('flat round')
             
-            # Filter change handlers
-            async def on_filter_change():
-                expense_list.refresh()
+            def show_page():
+                """Send only the visible rows to the browser"""
+                expense_table.rows[:] = pager.rows
+                expense_table.update()
+                page_label.text = f'Page {pager.page}'
+                previous_button.set_enabled(pager.has_previous)
+                next_button.set_enabled(pager.has_next)
+            
+            show_page()
+            
+            async def next_page():
+                await pager.next()
+                show_page()
+            
+            async def previous_page():
+                await pager.previous()
+                show_page()
+            
+            next_button.on_click(next_page)
+            previous_button.on_click(previous_page)
+            
+            async def on_change():
+                """Refetch the summary and the visible page"""
+                await refresh_data(pager)
+                show_page()
+                show_summary()
+            
+            async def after_change():
+                """After an add, edit or delete here; the change event patches the page unless the stream is down"""
+                if not live_updates.connected:
+                    await on_change()
+            
+            async def on_event(event: dict):
+                """Patch this page for a change made in any session"""
+                global current_summary
+                if event['type'] in ('imported', 'resync'):
+                    await on_change()
+                    return
+                if event['type'] == 'summary':
+                    # Left out when a newer change was already seen; its own summary follows
+                    if 'summary' in event:
+                        current_summary = event['summary']
+                        show_summary()
+                    return
+                if await pager.apply(event):
+                    show_page()
+            
+            client.on_disconnect(live_updates.subscribe(on_event))
+            
+            async def on_edit(e):
+                with content:
+                    await edit_expense(e.args, after_change)
+            
+            async def on_delete(e):
+                with content:
+                    await delete_expense(e.args, after_change)
+            
+            expense_table.on('edit', on_edit)
+            expense_table.on('delete', on_delete)
+            
+            # Filter change handlers: the API's indexes filter, and paging starts over.
+            # Typing is debounced; every change cancels the query it supersedes.
+            def on_filter_change(delay: float = 0.0):
+                filters = {}
+                if category_filter.value and category_filter.value != 'All':
+                    filters['category'] = category_filter.value
+                if search_input.value and search_input.value.strip():
+                    filters['search_term'] = search_input.value.strip()
+                pager.query(filters, show_page, delay)
             
             category_filter.on('update:model-value', lambda: on_filter_change())
-            search_input.on('update:model-value', lambda: on_filter_change())
+            search_input.on('update:model-value', lambda: on_filter_change(SEARCH_DEBOUNCE))
 
-async def edit_expense(expense):
-    """Edit expense dialog"""
+async def edit_expense(expense, on_change):
+    """Edit expense dialog; awaits ``on_change`` after saving"""
     with ui.dialog() as dialog, ui.card().classes('w-96'):
         ui.label('Edit Expense').classes('text-lg font-semibold mb-4')
         
@@ -363,16 +608,13 @@ async def edit_expense(expense):
                         'date': datetime.fromisoformat(date_input.value).isoformat()
                     }
                     
-                    response = requests.put(f"{API_BASE_URL}/expenses/{expense['id']}", json=update_data)
+                    await api.update_expense(expense['id'], update_data)
                     
-                    if response.status_code == 200:
-                        ui.notify('Expense updated successfully!', type='positive')
-                        await refresh_data()
-                        expense_list.refresh()
-                        summary_container.refresh()
-                        dialog.close()
-                    else:
-                        ui.notify('Failed to update expense', type='negative')
+                    ui.notify('Expense updated successfully!', type='positive')
+                    dialog.close()
+                    await on_change()
+                except ApiError:
+                    ui.notify('Failed to update expense', type='negative')
                 except Exception as e:
                     ui.notify(f'Error: {str(e)}', type='negative')
             
@@ -380,8 +622,8 @@ async def edit_expense(expense):
     
     dialog.open()
 
-async def delete_expense(expense):
-    """Delete expense with confirmation"""
+async def delete_expense(expense, on_change):
+    """Delete expense with confirmation; awaits ``on_change`` after deleting"""
     with ui.dialog() as dialog, ui.card().classes('w-80'):
         ui.label('Confirm Delete').classes('text-lg font-semibold mb-4')
         ui.label(f'Are you sure you want to delete "{expense.get("description", "")}"?').classes('mb-4')
@@ -391,16 +633,13 @@ async def delete_expense(expense):
             
             async def confirm_delete():
                 try:
-                    response = requests.delete(f"{API_BASE_URL}/expenses/{expense['id']}")
+                    await api.delete_expense(expense['id'])
                     
-                    if response.status_code == 200:
-                        ui.notify('Expense deleted successfully!', type='positive')
-                        await refresh_data()
-                        expense_list.refresh()
-                        summary_container.refresh()
-                        dialog.close()
-                    else:
-                        ui.notify('Failed to delete expense', type='negative')
+                    ui.notify('Expense deleted successfully!', type='positive')
+                    dialog.close()
+                    await on_change()
+                except ApiError:
+                    ui.notify('Failed to delete expense', type='negative')
                 except Exception as e:
                     ui.notify(f'Error: {str(e)}', type='negative')
             
@@ -409,15 +648,7 @@ async def delete_expense(expense):
     dialog.open()
 
 if __name__ in {"__main__", "__mp_main__"}:
-    # Start FastAPI server in background thread
-    fastapi_thread = threading.Thread(target=start_fastapi_thread, daemon=True)
-    fastapi_thread.start()
-    
-    # Give FastAPI time to start
-    import time
-    time.sleep(2)
-    
-    # Run NiceGUI
+    # The API is served by this same server, or already running at EXPENSE_API_URL
     ui.run(
         title='Expense Tracker',
         favicon='💰',
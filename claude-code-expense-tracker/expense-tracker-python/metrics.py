@@ -0,0 +1,212 @@
+import abc
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+# Latency buckets in seconds, from 100µs (in-memory reads) to 10s (large exports)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    """Base class for a labelled metric family"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[str]:
+        """The metric's sample lines in the text format"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class ValueMetric(Metric):
+    """One value per label set, either stored or read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Evaluate ``fn`` whenever the metrics are rendered"""
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            values[key] = fn()
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(ValueMetric):
+    """Monotonically increasing total"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(ValueMetric):
+    """Current value"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Bucketed distribution with a running sum and count"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last)], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, **labels):
+        """Decorator recording the wall-clock duration of each call, including calls that raise"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Prometheus text exposition format, as served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "expense_http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status")
+))
+STORAGE_OPERATION_SECONDS = REGISTRY.register(Histogram(
+    "expense_storage_operation_duration_seconds", "Storage method latency",
+    ("backend", "operation")
+))
+STORAGE_SAVE_SECONDS = REGISTRY.register(Histogram(
+    "expense_storage_save_duration_seconds", "Duration of durable writes (journal appends and snapshot rewrites)",
+    ("kind",)
+))
+STORAGE_WRITE_BYTES = REGISTRY.register(Counter(
+    "expense_storage_written_bytes_total", "Bytes written to storage files", ("kind",)
+))
+STORAGE_ROWS = REGISTRY.register(Gauge(
+    "expense_storage_rows", "Expenses currently stored", ("backend",)
+))
+STORAGE_VERSION = REGISTRY.register(Gauge(
+    "expense_storage_version", "Storage data version (number of mutations since start)", ("backend",)
+))
+RESPONSE_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "expense_response_cache_lookups_total", "Response cache lookups", ("result",)
+))
+RESPONSE_CACHE_BYTES = REGISTRY.register(Gauge(
+    "expense_response_cache_bytes", "Total size of the response bodies held in the cache"
+))
+
+
+def instrumented(method):
+    """Record the latency of a storage method, labelled with the instance's ``backend`` and the method name"""
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            STORAGE_OPERATION_SECONDS.observe(time.perf_counter() - start, backend=self.backend, operation=operation)
+    return wrapper
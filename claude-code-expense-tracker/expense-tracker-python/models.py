@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field, validator
 from enum import Enum
@@ -13,6 +13,13 @@ class ExpenseCategory(str, Enum):
     OTHER = "Other"
 
 
+def to_naive_local(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a timezone-aware datetime to naive local time, the form every stored date has"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
 class ExpenseCreate(BaseModel):
     amount: float = Field(..., gt=0, description="Expense amount must be positive")
     description: str = Field(..., min_length=1, max_length=200, description="Expense description")
@@ -30,11 +37,20 @@ class ExpenseCreate(BaseModel):
     @validator('description')
     def validate_description(cls, v):
         return v.strip()
+    
+    @validator('date')
+    def validate_date(cls, v):
+        return to_naive_local(v)
 
 
 class Expense(ExpenseCreate):
     id: str
     created_at: datetime = Field(default_factory=datetime.now)
+    
+    @classmethod
+    def from_create(cls, expense_id: str, data: ExpenseCreate) -> "Expense":
+        """Build an expense from already validated input without validating it a second time"""
+        return cls.model_construct(id=expense_id, created_at=datetime.now(), **dict(data))
 
 
 class ExpenseUpdate(BaseModel):
@@ -58,6 +74,16 @@ class ExpenseUpdate(BaseModel):
         if v is not None:
             return v.strip()
         return v
+    
+    @validator('date')
+    def validate_date(cls, v):
+        return to_naive_local(v)
+
+
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
 
 
 class ExpenseFilter(BaseModel):
@@ -65,6 +91,10 @@ class ExpenseFilter(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     search_term: Optional[str] = None
+    
+    @validator('start_date', 'end_date')
+    def validate_dates(cls, v):
+        return to_naive_local(v)
 
 
 class ExpenseSummary(BaseModel):
@@ -72,4 +102,29 @@ class ExpenseSummary(BaseModel):
     monthly_expenses: float
     expense_count: int
     top_category: Optional[str]
-    categories_breakdown: dict[str, float]
\ No newline at end of file
+    categories_breakdown: dict[str, float]
+
+
+class TimeseriesPoint(BaseModel):
+    period: date
+    total: float
+    count: int
+
+
+class CategoryBreakdown(BaseModel):
+    category: str
+    total: float
+    count: int
+    average: float
+    share: float
+
+
+class BulkImportError(BaseModel):
+    row: int
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkImportError]
\ No newline at end of file
@@ -0,0 +1,182 @@
+import cProfile
+import functools
+import itertools
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# A request asks to be profiled with this header or query parameter set to a true value
+PROFILE_HEADER = "x-profile"
+PROFILE_PARAM = "profile"
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+# Profile of the request being handled, visible to the thread-pool calls it makes
+_current_session: ContextVar[Optional["ProfileSession"]] = ContextVar("expense_profile_session", default=None)
+
+
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins such as pydantic-core's validate_python
+        return name
+    return f"{filename}:{line}({name})"
+
+
+class ProfileSession:
+    """cProfile data collected for one request across the event loop and storage threads"""
+
+    def __init__(self, method: str, path: str, query: str, reason: str):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.reason = reason
+        self.started_at = datetime.now()
+        self._profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def enable(self) -> Optional[cProfile.Profile]:
+        """Start profiling the calling thread; pass the result to ``disable``"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread (or interpreter, on 3.12+)
+            return None
+        with self._lock:
+            self._profilers.append(profiler)
+        return profiler
+
+    @staticmethod
+    def disable(profiler: Optional[cProfile.Profile]):
+        if profiler is not None:
+            profiler.disable()
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Call ``fn`` in the current thread while profiling it"""
+        profiler = self.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.disable(profiler)
+
+    def hot_functions(self, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Top functions by own time and by cumulative time"""
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return {"self_time": [], "cumulative": []}
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+
+        rows = [
+            {
+                "function": _function_label(func),
+                "calls": calls,
+                "self_ms": round(tottime * 1000, 3),
+                "cumulative_ms": round(cumtime * 1000, 3),
+            }
+            for func, (_, calls, tottime, cumtime, _) in stats.stats.items()
+        ]
+        return {
+            "self_time": sorted(rows, key=lambda row: row["self_ms"], reverse=True)[:limit],
+            "cumulative": sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:limit],
+        }
+
+
+def in_current_profile(fn: Callable) -> Callable:
+    """Wrap ``fn`` so that, when called in another thread, it joins the active request profile.
+
+    Executor threads do not inherit context variables, so the session is
+    looked up here, in the caller's context, and carried along.
+    """
+    session = _current_session.get()
+    if session is None:
+        return fn
+    return functools.partial(session.run, fn)
+
+
+class RequestProfiler:
+    """Opt-in cProfile profiling of API requests.
+
+    A request is profiled when it sets the ``X-Profile`` header or the
+    ``profile`` query parameter, or when it is picked by ``sample_rate``.
+    Requested profiles are always kept; sampled ones only when the request
+    took longer than ``slow_ms``. The newest ``max_profiles`` are kept in
+    memory. Only one request is profiled at a time; since the event loop
+    thread is shared, a profile can include work from concurrent requests.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, slow_ms: float = 250.0,
+                 max_profiles: int = 50, top: int = 25):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.top = top
+        self._profiles: deque = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def reason(self, headers, query_params) -> Optional[str]:
+        """Why a request should be profiled, or None"""
+        if headers.get(PROFILE_HEADER, "").lower() in TRUE_VALUES:
+            return "header"
+        if query_params.get(PROFILE_PARAM, "").lower() in TRUE_VALUES:
+            return "query"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def profile(self, request, call_next):
+        """Run ``call_next(request)``, profiled if the request asks for it or is sampled"""
+        reason = self.reason(request.headers, request.query_params)
+        if reason is None or not self._active.acquire(blocking=False):
+            return await call_next(request)
+
+        session = ProfileSession(request.method, request.url.path, request.url.query, reason)
+        token = _current_session.set(session)
+        start = time.perf_counter()
+        profiler = session.enable()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            session.disable(profiler)
+            duration_ms = (time.perf_counter() - start) * 1000
+            _current_session.reset(token)
+            self._active.release()
+            profile_id = self._keep(session, duration_ms, status)
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+
+    def _keep(self, session: ProfileSession, duration_ms: float, status: int) -> Optional[int]:
+        if session.reason == "sampled" and duration_ms < self.slow_ms:
+            return None
+        profile_id = next(self._ids)
+        entry = {
+            "id": profile_id,
+            "method": session.method,
+            "path": session.path,
+            "query": session.query,
+            "status": status,
+            "reason": session.reason,
+            "started_at": session.started_at.isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            **session.hot_functions(self.top),
+        }
+        with self._lock:
+            self._profiles.append(entry)
+        return profile_id
+
+    def profiles(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first"""
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        return profiles[:limit] if limit else profiles
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+
+class CachedResponse:
+    """A serialized response body with its ETag and extra headers"""
+
+    __slots__ = ("body", "etag", "headers", "expires")
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None, max_age: Optional[float] = None):
+        self.body = body
+        self.etag = make_etag(body)
+        self.headers = headers or {}
+        self.expires = time.monotonic() + max_age if max_age is not None else None
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body, so unchanged data keeps its tag across versions"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+def normalize_params(items: Iterable[Tuple[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    """Order-independent key for query parameters, ignoring empty values"""
+    return tuple(sorted((key, value) for key, value in items if value != ""))
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses, bounded by entry count and total body bytes.
+
+    Callers include the storage data version in the key, so a write makes
+    every earlier entry unreachable; stale entries simply age out of the LRU.
+    Entries built from time-dependent data can also carry a ``max_age``.
+    Bodies larger than ``max_entry_bytes`` (such as an unpaginated listing of
+    a large ledger) are served but not kept.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 max_entry_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8 if max_entry_bytes is None else max_entry_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires <= time.monotonic():
+                del self._entries[key]
+                self.size -= len(entry.body)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse):
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,254 @@
+import bisect
+import re
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Substring lookups need at least one full trigram
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+# Removed rows leave holes in the row numbering; renumber once they outnumber live rows by this much
+MAX_HOLES = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _discard(postings: array, row: int):
+    i = bisect.bisect_left(postings, row)
+    if i < len(postings) and postings[i] == row:
+        del postings[i]
+
+
+def _contains(postings: array, row: int) -> bool:
+    i = bisect.bisect_left(postings, row)
+    return i < len(postings) and postings[i] == row
+
+
+def _insert(postings: array, row: int):
+    # Rows are mostly added in increasing order, so appending is the common case
+    if not postings or postings[-1] < row:
+        postings.append(row)
+    else:
+        postings.insert(bisect.bisect_left(postings, row), row)
+
+
+class RowSearchIndex:
+    """Token and trigram inverted index over descriptions, addressed by row number.
+
+    The trigram postings answer the ``search_term`` substring filter: a
+    description can only contain the term if it contains every trigram of the
+    term, so intersecting those postings yields a small candidate set that is
+    then verified. The token postings, with a sorted token list for prefix
+    lookups, back ranked multi-term search.
+
+    Postings are sorted arrays of row numbers, which the caller assigns: the
+    columnar store passes its own rows, ``SearchIndex`` numbers expense ids.
+    Descriptions and dates are not copied: ``text_of`` and ``date_of`` read
+    them from the storage when a candidate is verified or results are
+    ordered, and ``rows`` lists the live rows when part of the index is built
+    late. Trigram postings, the bulk of the index, are only built by the
+    first substring query.
+
+    With ``deferred`` the token postings are not built as rows are added
+    either; the first query indexes every live row in one go instead, which
+    keeps indexing off the startup path.
+    """
+
+    def __init__(self, text_of: Callable[[int], str], date_of: Callable[[int], Any],
+                 rows: Callable[[], Iterable[int]], deferred: bool = False):
+        self._text_of = text_of
+        self._date_of = date_of
+        self._live_rows = rows
+        self._deferred = deferred
+        # Token count per row: shorter descriptions rank higher
+        self._lengths = array('H')
+        self._tokens: Dict[str, array] = {}
+        self._sorted_tokens: List[str] = []
+        self._trigrams: Optional[Dict[str, array]] = None
+
+    def add(self, row: int, description: str):
+        if not self._deferred:
+            self._index(row, description)
+
+    def _index(self, row: int, description: str):
+        text = description.lower()
+        tokens = tokenize(text)
+        if row >= len(self._lengths):
+            self._lengths.extend(array('H', bytes(2 * (row + 1 - len(self._lengths)))))
+        self._lengths[row] = min(len(tokens), 0xFFFF)
+
+        for token in set(tokens):
+            postings = self._tokens.get(token)
+            if postings is None:
+                postings = self._tokens[token] = array('I')
+                bisect.insort(self._sorted_tokens, token)
+            _insert(postings, row)
+
+        if self._trigrams is not None:
+            self._add_trigrams(row, text)
+
+    def _add_trigrams(self, row: int, text: str):
+        for gram in trigrams(text):
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                postings = self._trigrams[gram] = array('I')
+            _insert(postings, row)
+
+    def remove(self, row: int, description: str):
+        """Remove a row; ``description`` is the one it was added with"""
+        if not self._deferred:
+            self._unindex(row, description)
+
+    def _unindex(self, row: int, description: str):
+        text = description.lower()
+        for token in set(tokenize(text)):
+            postings = self._tokens[token]
+            _discard(postings, row)
+            if not postings:
+                del self._tokens[token]
+                del self._sorted_tokens[bisect.bisect_left(self._sorted_tokens, token)]
+
+        if self._trigrams is not None:
+            for gram in trigrams(text):
+                postings = self._trigrams[gram]
+                _discard(postings, row)
+                if not postings:
+                    del self._trigrams[gram]
+
+    def move(self, old_row: int, new_row: int, description: str):
+        """Follow a row the caller renumbered"""
+        if not self._deferred:
+            self._unindex(old_row, description)
+            self._index(new_row, description)
+
+    def build(self):
+        """Index every live row (no-op unless indexing was deferred)"""
+        if self._deferred:
+            self._deferred = False
+            for row in self._live_rows():
+                self._index(row, self._text_of(row))
+
+    def _build_trigrams(self):
+        if self._trigrams is None:
+            self._trigrams = {}
+            for row in self._live_rows():
+                self._add_trigrams(row, self._text_of(row).lower())
+
+    def substring_matches(self, term: str) -> Optional[Set[int]]:
+        """Rows whose description contains ``term`` (case-insensitive), or None if the term is too short to index"""
+        term = term.lower()
+        if len(term) < MIN_TRIGRAM_TERM_LENGTH:
+            return None
+        self.build()
+        self._build_trigrams()
+
+        postings = sorted((self._trigrams.get(gram, array('I')) for gram in trigrams(term)), key=len)
+        return {
+            row for row in postings[0]
+            if all(_contains(other, row) for other in postings[1:]) and term in self._text_of(row).lower()
+        }
+
+    def _prefix_matches(self, prefix: str) -> Dict[int, int]:
+        """Map rows to 2 when they contain ``prefix`` as a whole token, 1 when only as a token prefix"""
+        matches: Dict[int, int] = {}
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            weight = 2 if token == prefix else 1
+            for row in self._tokens[token]:
+                if matches.get(row, 0) < weight:
+                    matches[row] = weight
+        return matches
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """Rank descriptions containing every query term as a token or token prefix.
+
+        Whole-token hits score higher than prefix hits, and shorter
+        descriptions score higher than long ones with the same hits; equal
+        scores are ordered newest first. Returns (row, score) pairs, best first.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self.build()
+
+        scores: Optional[Dict[int, float]] = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            matches = self._prefix_matches(term)
+            if scores is None:
+                scores = {row: float(weight) for row, weight in matches.items()}
+            else:
+                scores = {row: score + matches[row] for row, score in scores.items() if row in matches}
+            if not scores:
+                return []
+
+        ranked = [(row, score / (1 + 0.1 * self._lengths[row])) for row, score in scores.items()]
+        ranked.sort(key=lambda item: (item[1], self._date_of(item[0])), reverse=True)
+        return ranked
+
+
+class SearchIndex(RowSearchIndex):
+    """``RowSearchIndex`` over expense ids, which it numbers itself.
+
+    New ids get the next row number; removed ones leave holes, and once holes
+    outnumber live rows the postings are rebuilt with dense numbers.
+    """
+
+    def __init__(self, text_of: Callable[[str], str], date_of: Callable[[str], datetime],
+                 deferred: bool = False):
+        super().__init__(
+            lambda row: text_of(self._ids[row]), lambda row: date_of(self._ids[row]), self._live, deferred
+        )
+        self._id_text_of = text_of
+        # Row number of every indexed expense, and the expense of every row number (None once removed)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+
+    def _live(self) -> Iterable[int]:
+        return (row for row, expense_id in enumerate(self._ids) if expense_id is not None)
+
+    def add(self, expense_id: str, description: str):
+        row = len(self._ids)
+        self._rows[expense_id] = row
+        self._ids.append(expense_id)
+        super().add(row, description)
+
+    def remove(self, expense_id: str, description: str):
+        """Remove an expense; ``description`` is the one it was added with"""
+        row = self._rows.pop(expense_id, None)
+        if row is None:
+            return
+        self._ids[row] = None
+        super().remove(row, description)
+
+        if len(self._ids) - len(self._rows) > max(MAX_HOLES, len(self._rows)):
+            self._renumber()
+
+    def _renumber(self):
+        """Rebuild the postings with dense row numbers"""
+        expense_ids = list(self._rows)
+        with_trigrams = self._trigrams is not None
+        self._rows, self._ids, self._lengths = {}, [], array('H')
+        self._tokens, self._sorted_tokens = {}, []
+        self._trigrams = {} if with_trigrams else None
+        for expense_id in expense_ids:
+            self.add(expense_id, self._id_text_of(expense_id))
+
+    def substring_matches(self, term: str) -> Optional[Set[str]]:
+        """Ids whose description contains ``term`` (case-insensitive), or None if the term is too short to index"""
+        rows = super().substring_matches(term)
+        return None if rows is None else {self._ids[row] for row in rows}
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        """``RowSearchIndex.search``, returning (id, score) pairs"""
+        return [(self._ids[row], score) for row, score in super().search(query)]
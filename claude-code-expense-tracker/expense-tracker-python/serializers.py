@@ -0,0 +1,285 @@
+import itertools
+import json
+import re
+import sys
+import uuid
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # the orjson format falls back to the standard library
+    orjson = None
+
+from columnar import CATEGORIES, EPOCH, MICROSECOND, RowColumns, from_epoch_us
+
+
+# (expense_id, serialized expense) as produced by ``expense_to_dict``
+Row = Tuple[str, dict]
+
+# Binary snapshots start with this marker, so the format is detected on load
+BINARY_MAGIC = b"EXPSNAP1"
+
+CATEGORY_CODES: Dict[str, int] = {category.value: code for code, category in enumerate(CATEGORIES)}
+
+
+OBJECT_START = re.compile(r'\s*\{\s*')
+OBJECT_KEY = re.compile(r'\s*"((?:[^"\\]|\\.)*)"\s*:\s*', re.DOTALL)
+OBJECT_SEPARATOR = re.compile(r'\s*([,}])\s*')
+
+
+def iter_json_object(path: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    """Stream the key/value pairs of a file holding one JSON object.
+
+    The file is read ``chunk_size`` characters at a time and each value is
+    decoded as soon as it is complete, so the whole document is never held
+    in memory at once. Raises ValueError for malformed or truncated input.
+    """
+    decode = json.JSONDecoder().raw_decode
+    with open(path, 'r') as f:
+        buf = f.read(chunk_size)
+        eof = not buf
+
+        start = OBJECT_START.match(buf)
+        while start is None or start.end() == len(buf):
+            if eof:
+                raise ValueError(f"{path} does not contain a JSON object")
+            chunk = f.read(chunk_size)
+            buf, eof = buf + chunk, not chunk
+            start = OBJECT_START.match(buf)
+        pos = start.end()
+        if buf[pos] == "}":
+            return
+
+        while True:
+            # Decode one entry; if it runs past the buffer, read more and retry it
+            key_match = OBJECT_KEY.match(buf, pos)
+            value = separator = None
+            if key_match is not None:
+                try:
+                    value, end = decode(buf, key_match.end())
+                    separator = OBJECT_SEPARATOR.match(buf, end)
+                except json.JSONDecodeError:
+                    pass
+
+            if separator is None:
+                if eof:
+                    raise ValueError(f"Malformed or truncated JSON object in {path}")
+                chunk = f.read(chunk_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                continue
+
+            key = key_match.group(1)
+            yield (json.loads(f'"{key}"') if "\\" in key else key), value
+            if separator.group(1) == "}":
+                return
+            pos = separator.end()
+
+
+class JsonSerializer:
+    """Pretty-printed JSON via the standard library (the original snapshot format)"""
+
+    name = "json"
+
+    def dumps(self, rows: Iterable[Row]) -> bytes:
+        return json.dumps(dict(rows), indent=2).encode()
+
+    def load(self, path: str, stream: bool = False) -> Iterator[Row]:
+        """Read the snapshot's rows; ``stream`` decodes them one at a time (slower, but
+        the file text and the whole decoded document are never in memory together)"""
+        if stream:
+            return iter_json_object(path)
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} does not contain a JSON object")
+        return iter(data.items())
+
+
+class OrjsonSerializer:
+    """The same JSON document, encoded and decoded by orjson when it is installed"""
+
+    name = "orjson"
+
+    def dumps(self, rows: Iterable[Row]) -> bytes:
+        if orjson is None:
+            return JsonSerializer().dumps(rows)
+        return orjson.dumps(dict(rows), option=orjson.OPT_INDENT_2)
+
+    def load(self, path: str, stream: bool = False) -> Iterator[Row]:
+        # orjson decodes the whole file several times faster than streaming it
+        if orjson is None:
+            return JsonSerializer().load(path, stream)
+        with open(path, 'rb') as f:
+            data = orjson.loads(f.read())
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} does not contain a JSON object")
+        return iter(data.items())
+
+
+class BinarySerializer:
+    """Fixed-width columnar snapshot.
+
+    Layout after the magic and a ``<II`` header (row count, extras length):
+    16-byte UUIDs, then int64 amount cents, int64 date and created_at epoch
+    microseconds, int8 category codes, uint32 description byte lengths and
+    the UTF-8 descriptions. Rows that do not fit (non-UUID ids, timezone-aware
+    dates, amounts with more than two decimals) follow as a JSON object.
+    """
+
+    name = "binary"
+
+    def dumps(self, rows: Iterable[Row]) -> bytes:
+        ids = bytearray()
+        cents, dates, created, lengths = array('q'), array('q'), array('q'), array('I')
+        categories = array('b')
+        descriptions: List[bytes] = []
+        extras: Dict[str, dict] = {}
+
+        for expense_id, data in rows:
+            packed = _pack_row(expense_id, data)
+            if packed is None:
+                extras[expense_id] = data
+                continue
+            key, amount_cents, date_us, created_us, category, description = packed
+            ids += key
+            cents.append(amount_cents)
+            dates.append(date_us)
+            created.append(created_us)
+            categories.append(category)
+            lengths.append(len(description))
+            descriptions.append(description)
+
+        extras_blob = json.dumps(extras).encode() if extras else b""
+        header = len(cents).to_bytes(4, "little") + len(extras_blob).to_bytes(4, "little")
+        return b"".join([
+            BINARY_MAGIC, header, bytes(ids),
+            _little_endian(cents), _little_endian(dates), _little_endian(created),
+            categories.tobytes(), _little_endian(lengths), *descriptions, extras_blob
+        ])
+
+    def load(self, path: str, stream: bool = False) -> Iterator[Row]:
+        """Read the snapshot's rows in their persisted dict form.
+
+        Building those dicts (ISO dates, formatted ids) costs more per row than
+        ``json.load``, so this is the slow way in; the columnar store reads
+        ``load_columns`` instead. The format's advantage is size.
+        """
+        columns, extras = self.load_columns(path)
+        # Hex-encode all ids at once; formatting slices is much cheaper than uuid.UUID per row
+        ids = columns.ids.hex()
+        for row, description in enumerate(columns.descriptions):
+            h = ids[row * 32:row * 32 + 32]
+            expense_id = f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+            yield expense_id, {
+                "amount": columns.amount_cents[row] / 100,
+                "description": description,
+                "category": CATEGORIES[columns.categories[row]].value,
+                "date": from_epoch_us(columns.dates[row]).isoformat(),
+                "id": expense_id,
+                "created_at": from_epoch_us(columns.created_at[row]).isoformat(),
+            }
+        yield from extras
+
+    def load_columns(self, path: str) -> Tuple[RowColumns, List[Row]]:
+        """Decode the fixed-width rows straight into column values (cents, epoch
+        microseconds, category codes), plus the rows stored as JSON"""
+        with open(path, 'rb') as f:
+            blob = memoryview(f.read())
+        if bytes(blob[:len(BINARY_MAGIC)]) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary snapshot")
+
+        pos = len(BINARY_MAGIC)
+        count = int.from_bytes(blob[pos:pos + 4], "little")
+        extras_length = int.from_bytes(blob[pos + 4:pos + 8], "little")
+        pos += 8
+
+        ids = bytes(blob[pos:pos + count * 16])
+        pos += count * 16
+        cents, pos = _read_array('q', blob, pos, count)
+        dates, pos = _read_array('q', blob, pos, count)
+        created, pos = _read_array('q', blob, pos, count)
+        categories, pos = _read_array('b', blob, pos, count)
+        lengths, pos = _read_array('I', blob, pos, count)
+
+        end = pos + sum(lengths)
+        if len(ids) != count * 16 or end + extras_length != len(blob):
+            raise ValueError(f"Truncated binary snapshot {path}")
+        text = str(blob[pos:end], "utf-8")
+        offsets = [0, *itertools.accumulate(lengths)]
+        if len(text) == end - pos:
+            # All ASCII: byte offsets are character offsets, so slice the decoded text
+            descriptions = [text[offsets[row]:offsets[row + 1]] for row in range(count)]
+        else:
+            descriptions = [str(blob[pos + offsets[row]:pos + offsets[row + 1]], "utf-8") for row in range(count)]
+
+        extras = list(json.loads(bytes(blob[end:])).items()) if extras_length else []
+        return RowColumns(ids, cents, dates, created, categories, descriptions), extras
+
+
+def _pack_row(expense_id: str, data: dict):
+    """Return the fixed-width fields for a row, or None if it has to be stored as JSON"""
+    try:
+        key = uuid.UUID(expense_id)
+        if str(key) != expense_id:
+            return None
+        expense_date = datetime.fromisoformat(data["date"])
+        created_at = datetime.fromisoformat(data["created_at"])
+        amount_cents = round(data["amount"] * 100)
+    except (ValueError, TypeError, KeyError):
+        return None
+    if expense_date.tzinfo is not None or created_at.tzinfo is not None or amount_cents / 100 != data["amount"]:
+        return None
+    category = CATEGORY_CODES.get(data["category"])
+    if category is None:
+        return None
+    return (
+        key.bytes,
+        amount_cents,
+        (expense_date - EPOCH) // MICROSECOND,
+        (created_at - EPOCH) // MICROSECOND,
+        category,
+        data["description"].encode(),
+    )
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode: str, blob: memoryview, pos: int, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = pos + count * values.itemsize
+    if end > len(blob):
+        raise ValueError("Truncated binary snapshot")
+    values.frombytes(blob[pos:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer in (JsonSerializer(), OrjsonSerializer(), BinarySerializer())
+}
+
+
+def get_serializer(name: Optional[str] = None):
+    """Look up a snapshot serializer by name ("json", "orjson" or "binary")"""
+    try:
+        return SERIALIZERS[name or "json"]
+    except KeyError:
+        raise ValueError(f"Unknown snapshot format: {name}")
+
+
+def detect_serializer(path: str, default):
+    """Pick the serializer that can read ``path``: binary by its magic bytes, otherwise ``default`` if it reads JSON"""
+    with open(path, 'rb') as f:
+        head = f.read(len(BINARY_MAGIC))
+    if head == BINARY_MAGIC:
+        return SERIALIZERS["binary"]
+    return default if default.name != "binary" else SERIALIZERS["json"]
@@ -0,0 +1,353 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List, Optional, Tuple
+from models import Expense, ExpenseCreate, ExpenseUpdate, ExpenseFilter, ExpenseSummary, ExpenseCategory
+from engines import JournalEngine, expense_to_dict
+from columnar import Columns, build_columns
+from storage import check_fields, check_limit, decode_cursor, encode_cursor, iter_csv_chunks
+from search_index import tokenize
+from metrics import instrumented
+import uuid
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id TEXT PRIMARY KEY,
+    amount REAL NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses(category, date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+    description, content='expenses', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+    INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+    INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN
+    INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+    INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT = (
+    "INSERT INTO expenses (id, amount, description, category, date, created_at) "
+    "VALUES (:id, :amount, :description, :category, :date, :created_at) "
+    "ON CONFLICT(id) DO UPDATE SET amount = excluded.amount, description = excluded.description, "
+    "category = excluded.category, date = excluded.date, created_at = excluded.created_at"
+)
+
+# Data version shared by every process using the database, bumped inside each write transaction
+BUMP_VERSION = (
+    "INSERT INTO meta (key, value) VALUES ('version', 1) "
+    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+)
+
+# Seconds a connection waits for another process's write transaction before giving up
+BUSY_TIMEOUT = 30.0
+
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_FTS_TERM_LENGTH = 3
+
+
+class SqliteExpenseStorage:
+    """ExpenseStorage backed by SQLite, with indexed date/category filters and FTS5 search.
+
+    Exposes the same public API as ``ExpenseStorage``. On first use the
+    contents of ``json_file`` (snapshot and journal) are imported once.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_file: str = "expenses.db", json_file: Optional[str] = "expenses.json"):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets several worker processes read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        if json_file:
+            self.migrate_from_json(json_file)
+
+    def migrate_from_json(self, json_file: str) -> int:
+        """Import expenses from a JSON snapshot/journal once; returns the number of imported rows"""
+        with self._lock, self._conn:
+            # Take the write lock up front so concurrently starting workers import only once
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return 0
+
+            imported = {}
+            if os.path.exists(json_file):
+                for op, expense_id, expense_data in JournalEngine(json_file).load():
+                    if op == "put":
+                        imported[expense_id] = Expense(**expense_data)
+                    else:
+                        imported.pop(expense_id, None)
+
+            self._conn.executemany(
+                UPSERT,
+                (expense_to_dict(expense) for expense in imported.values())
+            )
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (os.path.abspath(json_file),)
+            )
+            self._conn.execute(BUMP_VERSION)
+            return len(imported)
+
+    @property
+    def version(self) -> int:
+        """Data version, bumped by every write from any process, so caches and analytics snapshots can tell they are stale"""
+        with self._lock:
+            return self._read_version()
+
+    def _read_version(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _row_to_expense(self, row: sqlite3.Row) -> Expense:
+        return Expense(**dict(row))
+
+    def _write(self, expense: Expense):
+        self._conn.execute(UPSERT, expense_to_dict(expense))
+        self._conn.execute(BUMP_VERSION)
+
+    def flush(self):
+        """Every write is committed in its own transaction, so there is nothing to flush"""
+
+    def compact(self):
+        """Rebuild the database file to reclaim free pages"""
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    @instrumented
+    def create_expense(self, expense_data: ExpenseCreate) -> Expense:
+        """Create a new expense"""
+        expense = Expense.from_create(str(uuid.uuid4()), expense_data)
+        with self._lock, self._conn:
+            self._write(expense)
+        return expense
+
+    @instrumented
+    def create_many(self, expenses_data: List[ExpenseCreate]) -> List[Expense]:
+        """Create many expenses in a single transaction"""
+        expenses = [
+            Expense.from_create(str(uuid.uuid4()), expense_data)
+            for expense_data in expenses_data
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, (expense_to_dict(expense) for expense in expenses))
+            self._conn.execute(BUMP_VERSION)
+        return expenses
+
+    def count(self) -> int:
+        """Number of stored expenses"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+    def column_snapshot(self) -> Tuple[int, Columns]:
+        """Return the data version with amount/date/category columns for every expense"""
+        with self._lock, self._conn:
+            # One read transaction, so the version matches the rows even while other processes write
+            self._conn.execute("BEGIN")
+            version = self._read_version()
+            rows = self._conn.execute("SELECT amount, category, date FROM expenses").fetchall()
+        return version, build_columns(
+            Expense.model_construct(
+                amount=row["amount"],
+                category=ExpenseCategory(row["category"]),
+                date=datetime.fromisoformat(row["date"])
+            )
+            for row in rows
+        )
+
+    @instrumented
+    def get_expense(self, expense_id: str) -> Optional[Expense]:
+        """Get expense by ID"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM expenses WHERE id = ?", (expense_id,)
+            ).fetchone()
+        return self._row_to_expense(row) if row else None
+
+    @instrumented
+    def get_all_expenses(self, filters: Optional[ExpenseFilter] = None) -> List[Expense]:
+        """Get all expenses with optional filtering, newest first"""
+        return self.get_expenses_page(filters)[0]
+
+    @instrumented
+    def get_expenses_page(
+        self,
+        filters: Optional[ExpenseFilter] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get one page of filtered expenses, newest first, and the cursor for the next page"""
+        fields = check_fields(fields)
+        limit = check_limit(limit)
+        clauses = []
+        params = []
+
+        if filters:
+            if filters.category:
+                clauses.append("category = ?")
+                params.append(filters.category.value)
+
+            if filters.start_date:
+                clauses.append("date >= ?")
+                params.append(filters.start_date.isoformat())
+
+            if filters.end_date:
+                clauses.append("date <= ?")
+                params.append(filters.end_date.isoformat())
+
+            if filters.search_term:
+                if len(filters.search_term) >= MIN_FTS_TERM_LENGTH:
+                    clauses.append("rowid IN (SELECT rowid FROM expenses_fts WHERE expenses_fts MATCH ?)")
+                    params.append('"' + filters.search_term.replace('"', '""') + '"')
+                else:
+                    clauses.append("description LIKE ? ESCAPE '\\'")
+                    escaped = filters.search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    params.append(f"%{escaped}%")
+
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            clauses.append("(date < ? OR (date = ? AND id < ?))")
+            params.extend([cursor_date.isoformat(), cursor_date.isoformat(), cursor_id])
+
+        query = "SELECT * FROM expenses"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY date DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        page = [self._row_to_expense(row) for row in rows[:limit]]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            next_cursor = encode_cursor(page[-1])
+
+        if fields:
+            page = [expense.dict(include=set(fields)) for expense in page]
+        return page, next_cursor
+
+    @instrumented
+    def search(self, query: str, limit: int = 20) -> List[Expense]:
+        """Find expenses whose description contains every query term, best bm25 match first.
+
+        The trigram index matches terms anywhere in the description, not only
+        at word starts; terms shorter than three characters use LIKE.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        phrases = ['"' + term + '"' for term in terms if len(term) >= MIN_FTS_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < MIN_FTS_TERM_LENGTH]
+        clauses = ["e.description LIKE ?"] * len(short_terms)
+        params: List[Any] = [f"%{term}%" for term in short_terms]
+
+        if phrases:
+            query_sql = "SELECT e.* FROM expenses_fts JOIN expenses e ON e.rowid = expenses_fts.rowid"
+            clauses.insert(0, "expenses_fts MATCH ?")
+            params.insert(0, " AND ".join(phrases))
+            order = "bm25(expenses_fts), e.date DESC"
+        else:
+            query_sql = "SELECT e.* FROM expenses e"
+            order = "e.date DESC"
+
+        query_sql += " WHERE " + " AND ".join(clauses) + f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query_sql, params).fetchall()
+        return [self._row_to_expense(row) for row in rows]
+
+    @instrumented
+    def update_expense(self, expense_id: str, update_data: ExpenseUpdate) -> Optional[Expense]:
+        """Update an existing expense"""
+        with self._lock, self._conn:
+            # Read and write in one immediate transaction, so another process cannot write in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            expense = self.get_expense(expense_id)
+            if expense is None:
+                return None
+
+            for field, value in update_data.dict(exclude_unset=True).items():
+                setattr(expense, field, value)
+
+            self._write(expense)
+        return expense
+
+    @instrumented
+    def delete_expense(self, expense_id: str) -> bool:
+        """Delete an expense"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+            if cursor.rowcount:
+                self._conn.execute(BUMP_VERSION)
+        return cursor.rowcount > 0
+
+    @instrumented
+    def get_summary(self) -> ExpenseSummary:
+        """Get expense summary statistics"""
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+
+        with self._lock:
+            total_expenses, expense_count = self._conn.execute(
+                "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM expenses"
+            ).fetchone()
+            monthly_expenses = self._conn.execute(
+                "SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE date >= ?",
+                (thirty_days_ago.isoformat(),)
+            ).fetchone()[0]
+            totals = dict(self._conn.execute(
+                "SELECT category, SUM(amount) FROM expenses GROUP BY category"
+            ).fetchall())
+
+        categories_breakdown = {
+            category.value: totals[category.value]
+            for category in ExpenseCategory
+            if totals.get(category.value, 0) > 0
+        }
+
+        top_category = None
+        if categories_breakdown:
+            top_category = max(categories_breakdown.keys(), key=lambda k: categories_breakdown[k])
+
+        return ExpenseSummary(
+            total_expenses=total_expenses,
+            monthly_expenses=monthly_expenses,
+            expense_count=expense_count,
+            top_category=top_category,
+            categories_breakdown=categories_breakdown
+        )
+
+    @instrumented
+    def export_to_csv(self) -> str:
+        """Export expenses to CSV format"""
+        return "".join(self.iter_csv()) or "No expenses to export"
+
+    def iter_csv(self, filters: Optional[ExpenseFilter] = None, chunk_size: int = 1000) -> Iterator[str]:
+        """Stream filtered expenses as CSV text chunks, newest first"""
+        return iter_csv_chunks(self.get_expenses_page, filters, chunk_size)
@@ -1,83 +1,576 @@
+import base64
+import bisect
+import csv
+import functools
+import io
 import json
 import os
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
 from models import Expense, ExpenseCreate, ExpenseUpdate, ExpenseFilter, ExpenseSummary, ExpenseCategory
+from engines import FILE_LOCKING, Change, JournalEngine, expense_to_dict
+from columnar import CATEGORIES, ColumnarExpenses, Columns, RowColumns, build_columns, column_models, from_epoch_us, wall_clock_us
+from lazy_expenses import LazyExpenses
+from serializers import get_serializer
+from write_coordinator import WriteCoordinator
+from search_index import RowSearchIndex, SearchIndex
+from metrics import instrumented
 import uuid
 
 
+EXPENSE_FIELDS = tuple(Expense.__fields__)
+
+# Batches up to this size are inserted into the date index one by one (an O(n) list
+# insert each); larger ones are appended and the index is re-sorted once
+SORTED_INSERT_MAX = 512
+
+
+def to_cents(amount: float) -> int:
+    """Convert a 2-decimal amount to integer cents so running totals stay exact"""
+    return int(round(amount * 100))
+
+
+def locked(method):
+    """Run a storage method while holding the instance lock, after catching up with other processes"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.shared:
+            self._refresh()
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def mutation(method):
+    """Apply a mutation under the instance lock, then (with autoflush) wait outside the lock until it is durable"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.shared:
+            return self._shared_mutation(method, *args, **kwargs)
+        with self._lock:
+            self._last_batch = None
+            result = method(self, *args, **kwargs)
+            batch = self._last_batch
+        if batch is not None and self.autoflush:
+            self._coordinator.wait(batch)
+        return result
+    return wrapper
+
+
+def encode_cursor(expense: Expense) -> str:
+    """Build an opaque keyset cursor pointing just past ``expense`` in newest-first order"""
+    key = json.dumps([expense.date.isoformat(), expense.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor into its (date, id) key"""
+    try:
+        date_str, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date_str), str(expense_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def check_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Validate a field projection against the Expense model"""
+    if not fields:
+        return None
+    unknown = [field for field in fields if field not in EXPENSE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def check_limit(limit: Optional[int]) -> Optional[int]:
+    """Validate a page size; None means no limit"""
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    return limit
+
+
 class ExpenseStorage:
-    def __init__(self, data_file: str = "expenses.json"):
+    # Label for this backend in the metrics
+    backend = "json"
+    
+    def __init__(self, data_file: str = "expenses.json", engine=None, autoflush: bool = True,
+                 commit_window: float = 0.005, max_batch: int = 100, columnar: bool = False,
+                 fast_start: bool = False, snapshot_format: str = "json", shared: bool = False):
         self.data_file = data_file
-        self._load_data()
+        # Keep rows in compact columns (see columnar.py) instead of one pydantic model per expense
+        self.columnar = columnar
+        # Load persisted rows without building models and defer the search index until first used
+        self.fast_start = fast_start
+        # snapshot_format picks the snapshot serializer: "json", "orjson" or "binary" (see serializers.py)
+        self.engine = engine if engine is not None else JournalEngine(data_file, serializer=get_serializer(snapshot_format))
+        # With autoflush off, mutations return before their changes are written; call flush() to wait
+        self.autoflush = autoflush
+        self._lock = threading.RLock()
+        self._coordinator = WriteCoordinator(self._write_batch, window=commit_window, max_batch=max_batch)
+        self._last_batch = None
+        # Bumped on every mutation (ours or, when shared, another process's) so derived data
+        # (analytics snapshots, caches) can tell it is stale
+        self._version = 0
+        # Several processes use the same files: writes hold the engine's file lock and are written
+        # at once, and every operation first applies the changes other processes have written
+        self.shared = shared
+        self._unsaved: List[Change] = []
+        if shared:
+            if not FILE_LOCKING:
+                raise ValueError("Shared storage needs POSIX file locking (fcntl)")
+            with self.engine.lock(shared=True):
+                self._load_data()
+        else:
+            self._load_data()
     
     def _load_data(self):
-        """Load expenses from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.expenses = {
-                        expense_id: Expense(**expense_data) 
-                        for expense_id, expense_data in data.items()
-                    }
-            except (json.JSONDecodeError, ValueError):
-                self.expenses = {}
+        """Load expenses by replaying the engine's snapshot and journal"""
+        self._reset()
+        # Append snapshot rows to the date index and sort it once, instead of an O(n) insert per row
+        self._appending = True
+        try:
+            # Columnar stores keep far less than the decoded snapshot, so stream it to keep
+            # the load's peak memory down; otherwise decoding the whole file is faster.
+            # Binary snapshots are read as columns rather than one dict per row, except by
+            # lazy stores, which keep the dicts instead of building models
+            columns = not isinstance(self.expenses, LazyExpenses)
+            for change in self.engine.load(stream=self.columnar, columns=columns):
+                self._apply(change)
+            self._sort_date_index()
+        except (json.JSONDecodeError, ValueError, KeyError, TypeError):
+            self._reset()
+    
+    def _apply(self, change: Change):
+        """Apply a persisted change to the in-memory state"""
+        op, expense_id, expense_data = change
+        if op == "columns":
+            self._put_columns(expense_data)
+        elif op != "put":
+            self._remove(expense_id)
+        elif isinstance(self.expenses, LazyExpenses):
+            self._put_raw(expense_id, expense_data)
+        else:
+            self._put(Expense(**expense_data))
+    
+    def _refresh(self):
+        """Apply changes other processes have written, if the files changed since we last saw them"""
+        # A stat or two when nothing changed, so this can run before every operation
+        if self.engine.changed():
+            with self.engine.lock(shared=True), self._lock:
+                self._catch_up()
+    
+    def _catch_up(self):
+        """Bring memory up to date with the files; call with the engine lock and instance lock held"""
+        changes = self.engine.pending_changes()
+        if changes is None:
+            # Another process compacted the journal into a new snapshot
+            self._load_data()
+        elif changes:
+            for change in changes:
+                self._apply(change)
+        else:
+            return
+        self._version += 1
+    
+    def _shared_mutation(self, method, *args, **kwargs):
+        """Run a mutation as the only writer across processes and write it before releasing the file lock"""
+        with self.engine.lock():
+            with self._lock:
+                self._catch_up()
+                self._unsaved = []
+                result = method(self, *args, **kwargs)
+                changes, self._unsaved = self._unsaved, []
+            # Readers in this process are not blocked while the journal is written
+            if changes:
+                self.engine.write(changes, self._snapshot)
+        return result
+    
+    def _reset(self):
+        """Clear the in-memory expenses and their aggregates"""
+        if self.columnar:
+            self.expenses = ColumnarExpenses()
+        elif self.fast_start:
+            self.expenses = LazyExpenses()
         else:
             self.expenses = {}
+        self._category_totals = {category: 0 for category in ExpenseCategory}
+        self._daily_totals: Dict[date, int] = {}
+        self._days: List[date] = []
+        # Date index: parallel sequences ordered by (date, id), oldest first, of dates and refs.
+        # A ref is the id, or for columnar stores the row number, with the date in epoch
+        # microseconds: both kept in arrays, so the index holds no Python object per row
+        if self.columnar:
+            self._dates, self._date_refs = array('q'), array('I')
+        else:
+            self._dates, self._date_refs = [], []
+        # While loading or bulk inserting, rows are appended unsorted until _sort_date_index runs
+        self._appending = False
+        # Token and trigram postings over descriptions, for search and the search_term filter
+        if self.columnar:
+            store = self.expenses
+            self._search = RowSearchIndex(
+                store.descriptions.__getitem__,
+                store.dates.__getitem__,
+                lambda: range(store.row_count),
+                deferred=self.fast_start
+            )
+        else:
+            self._search = SearchIndex(self._description_of, self._date_of, deferred=self.fast_start)
     
-    def _save_data(self):
-        """Save expenses to JSON file"""
-        data = {
-            expense_id: expense.dict()
-            for expense_id, expense in self.expenses.items()
-        }
+    def _put(self, expense: Expense):
+        """Insert or replace an expense in memory, keeping the aggregates current"""
+        self._remove(expense.id)
+        if self.columnar:
+            # Indexed by row number, so the row must exist first
+            self._index_add(expense, self.expenses.put(expense.id, expense, new=True))
+        else:
+            self._index_add(expense)
+            self.expenses[expense.id] = expense
+    
+    def _put_raw(self, expense_id: str, data: dict):
+        """Insert a persisted row into a lazy store, indexing it from the raw fields without building a model"""
+        self._remove(expense_id)
+        self._index_row(
+            expense_id,
+            data["amount"],
+            ExpenseCategory(data["category"]),
+            datetime.fromisoformat(data["date"]),
+            data["description"]
+        )
+        self.expenses.put_raw(expense_id, data)
+    
+    def _put_columns(self, columns: RowColumns):
+        """Load a block of new snapshot rows; columnar stores index them without building models"""
+        if not self.columnar:
+            for expense in column_models(columns):
+                self._put(expense)
+            return
+        
+        store = self.expenses
+        for row in store.extend(columns):
+            self._index_row(
+                store.id_of(row),
+                store.amount_cents[row] / 100,
+                CATEGORIES[store.categories[row]],
+                from_epoch_us(store.dates[row]),
+                store.descriptions[row],
+                row
+            )
+    
+    def _remove(self, expense_id: str) -> Optional[Expense]:
+        """Remove an expense from memory, keeping the aggregates current"""
+        if self.columnar:
+            return self._remove_row(expense_id)
+        expense = self.expenses.pop(expense_id, None)
+        if expense is not None:
+            self._index_remove(expense)
+        return expense
+    
+    def _remove_row(self, expense_id: str) -> Optional[Expense]:
+        """Remove a columnar row; the store moves its last row into the gap, and the indexes follow"""
+        row = self.expenses.row_of(expense_id)
+        if row is None:
+            return None
+        expense = self.expenses.expense_at(row)
+        self._index_remove(expense, row)
         
-        # Convert datetime objects to ISO format strings
-        for expense_data in data.values():
-            expense_data['date'] = expense_data['date'].isoformat()
-            expense_data['created_at'] = expense_data['created_at'].isoformat()
+        last = self.expenses.row_count - 1
+        if row != last:
+            position = self._ref_position(last)
+            self._search.move(last, row, self.expenses.descriptions[last])
+        del self.expenses[expense_id]
+        if row != last:
+            self._date_refs[position] = row
+        return expense
+    
+    def _ref(self, expense_id: str):
+        """The date and search indexes' reference to a stored expense"""
+        return self.expenses.row_of(expense_id) if self.columnar else expense_id
+    
+    def _expense_of(self, ref) -> Expense:
+        return self.expenses.expense_at(ref) if self.columnar else self.expenses[ref]
+    
+    def _cents_of(self, ref) -> int:
+        if self.columnar:
+            return self.expenses.amount_cents[ref]
+        return to_cents(self.expenses[ref].amount)
+    
+    def _description_of(self, ref) -> str:
+        # Columnar and lazy stores answer from their rows without building a model
+        if self.columnar:
+            return self.expenses.descriptions[ref]
+        if isinstance(self.expenses, dict):
+            return self.expenses[ref].description
+        return self.expenses.description_of(ref)
+    
+    def _category_of(self, ref) -> ExpenseCategory:
+        if self.columnar:
+            return CATEGORIES[self.expenses.categories[ref]]
+        if isinstance(self.expenses, dict):
+            return self.expenses[ref].category
+        return self.expenses.category_of(ref)
+    
+    def _date_of(self, expense_id: str) -> datetime:
+        # Only for id refs: the columnar date index reads the store's date column
+        if isinstance(self.expenses, dict):
+            return self.expenses[expense_id].date
+        return self.expenses.date_of(expense_id)
+    
+    def _date_key(self, value: datetime):
+        """A date as the date index holds it: epoch microseconds of its wall-clock time for columnar stores"""
+        return wall_clock_us(value) if self.columnar else value
+    
+    def _index_add(self, expense: Expense, ref=None):
+        self._index_row(expense.id, expense.amount, expense.category, expense.date, expense.description, ref)
+    
+    def _index_row(self, expense_id: str, amount: float, category: ExpenseCategory,
+                   expense_date: datetime, description: str, ref=None):
+        # Find the date index position before touching any aggregate, so a date that
+        # cannot be ordered against the others fails without leaving them inconsistent
+        position = None if self._appending else self._date_position(expense_date, expense_id)
+        if ref is None:
+            ref = self._ref(expense_id)
+        cents = to_cents(amount)
+        self._category_totals[category] += cents
+        
+        day = expense_date.date()
+        if day not in self._daily_totals:
+            bisect.insort(self._days, day)
+            self._daily_totals[day] = 0
+        self._daily_totals[day] += cents
+        
+        key = self._date_key(expense_date)
+        if position is None:
+            self._dates.append(key)
+            self._date_refs.append(ref)
+        else:
+            self._dates.insert(position, key)
+            self._date_refs.insert(position, ref)
         
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self._search.add(ref, description)
     
+    def _sort_date_index(self):
+        """Sort rows appended while loading or bulk inserting and go back to sorted inserts"""
+        if not self._appending:
+            return
+        if self.columnar:
+            id_of = self.expenses.id_of
+            order = sorted(zip(self._dates, map(id_of, self._date_refs), self._date_refs))
+            self._dates = array('q', (key for key, _, _ in order))
+            self._date_refs = array('I', (row for _, _, row in order))
+        else:
+            order = sorted(zip(self._dates, self._date_refs))
+            self._dates = [expense_date for expense_date, _ in order]
+            self._date_refs = [expense_id for _, expense_id in order]
+        self._appending = False
+    
+    def _index_remove(self, expense: Expense, ref=None):
+        # A journal replay removing a row ends the append-only phase
+        self._sort_date_index()
+        cents = to_cents(expense.amount)
+        self._category_totals[expense.category] -= cents
+        
+        position = self._date_position(expense.date, expense.id)
+        del self._dates[position]
+        del self._date_refs[position]
+        self._search.remove(self._ref(expense.id) if ref is None else ref, expense.description)
+        
+        day = expense.date.date()
+        self._daily_totals[day] -= cents
+        day_start = datetime.combine(day, datetime.min.time(), expense.date.tzinfo)
+        lo = bisect.bisect_left(self._dates, self._date_key(day_start))
+        if lo == len(self._dates) or self._dates[lo] >= self._date_key(day_start + timedelta(days=1)):
+            del self._daily_totals[day]
+            del self._days[bisect.bisect_left(self._days, day)]
+    
+    def _date_position(self, expense_date: datetime, expense_id: str) -> int:
+        """Locate (date, id) in the date index; ids are sorted within a run of equal dates"""
+        return self._key_position(self._date_key(expense_date), expense_id)
+    
+    def _key_position(self, key, expense_id: str) -> int:
+        lo = bisect.bisect_left(self._dates, key)
+        hi = bisect.bisect_right(self._dates, key, lo)
+        if not self.columnar:
+            return bisect.bisect_left(self._date_refs, expense_id, lo, hi)
+        
+        # Refs are row numbers here: compare the ids of their rows
+        id_of = self.expenses.id_of
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if id_of(self._date_refs[mid]) < expense_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def _ref_position(self, ref) -> int:
+        """Locate a stored expense in the date index"""
+        if self.columnar:
+            return self._key_position(self.expenses.dates[ref], self.expenses.id_of(ref))
+        return self._date_position(self._date_of(ref), ref)
+    
+    def _save_data(self, changes: List[Change]):
+        """Queue changes with the write coordinator, which groups concurrent writers into one engine write"""
+        if changes:
+            self._version += 1
+            if self.shared:
+                self._unsaved.extend(changes)
+            else:
+                self._last_batch = self._coordinator.submit(changes)
+    
+    def _write_batch(self, changes: List[Change]):
+        # Called by the coordinator outside the instance lock, so readers are not blocked by I/O
+        self.engine.write(changes, self._snapshot)
+    
+    def _snapshot(self) -> Dict[str, Expense]:
+        # Called while writing, so it must not try to catch up (the writer already has)
+        with self._lock:
+            return self.expenses.copy()
+    
+    def flush(self):
+        """Block until every change made so far has been written"""
+        self._coordinator.wait()
+    
+    def compact(self):
+        """Fold any journaled changes into a fresh snapshot"""
+        if self.shared:
+            with self.engine.lock():
+                with self._lock:
+                    self._catch_up()
+                self.engine.compact(self._snapshot())
+            return
+        self.flush()
+        with self._coordinator.write_lock:
+            self.engine.compact(self._snapshot())
+    
+    @property
+    def version(self) -> int:
+        """Data version, bumped by every change; when shared, includes other processes' changes"""
+        if self.shared:
+            self._refresh()
+        return self._version
+    
+    @instrumented
+    @mutation
     def create_expense(self, expense_data: ExpenseCreate) -> Expense:
         """Create a new expense"""
         expense_id = str(uuid.uuid4())
-        expense = Expense(id=expense_id, **expense_data.dict())
-        self.expenses[expense_id] = expense
-        self._save_data()
+        expense = Expense.from_create(expense_id, expense_data)
+        self._put(expense)
+        self._save_data([("put", expense_id, expense_to_dict(expense))])
         return expense
     
+    @instrumented
+    @mutation
+    def create_many(self, expenses_data: List[ExpenseCreate]) -> List[Expense]:
+        """Create many expenses with a single storage flush"""
+        expenses = [
+            Expense.from_create(str(uuid.uuid4()), expense_data)
+            for expense_data in expenses_data
+        ]
+        # Large batches are appended to the date index and sorted once, so an import
+        # costs O(n log n) instead of an O(n) insert per row
+        self._appending = len(expenses) > SORTED_INSERT_MAX
+        try:
+            for expense in expenses:
+                self._put(expense)
+        finally:
+            self._sort_date_index()
+        self._save_data([("put", expense.id, expense_to_dict(expense)) for expense in expenses])
+        return expenses
+    
+    def count(self) -> int:
+        """Number of stored expenses"""
+        return len(self.expenses)
+    
+    @locked
+    def column_snapshot(self) -> Tuple[int, Columns]:
+        """Return the data version with amount/date/category columns for every expense"""
+        if isinstance(self.expenses, ColumnarExpenses):
+            return self._version, self.expenses.columns()
+        return self._version, build_columns(self.expenses.values())
+    
+    @instrumented
+    @locked
     def get_expense(self, expense_id: str) -> Optional[Expense]:
         """Get expense by ID"""
         return self.expenses.get(expense_id)
     
+    @instrumented
     def get_all_expenses(self, filters: Optional[ExpenseFilter] = None) -> List[Expense]:
-        """Get all expenses with optional filtering"""
-        expenses = list(self.expenses.values())
-        
-        if filters:
-            if filters.category:
-                expenses = [e for e in expenses if e.category == filters.category]
-            
-            if filters.start_date:
-                expenses = [e for e in expenses if e.date >= filters.start_date]
-            
-            if filters.end_date:
-                expenses = [e for e in expenses if e.date <= filters.end_date]
-            
-            if filters.search_term:
-                search_lower = filters.search_term.lower()
-                expenses = [
-                    e for e in expenses 
-                    if search_lower in e.description.lower()
-                ]
-        
-        # Sort by date (newest first)
-        expenses.sort(key=lambda x: x.date, reverse=True)
-        return expenses
+        """Get all expenses with optional filtering, newest first"""
+        return self.get_expenses_page(filters)[0]
+    
+    @instrumented
+    @locked
+    def get_expenses_page(
+        self,
+        filters: Optional[ExpenseFilter] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get one page of filtered expenses, newest first, and the cursor for the next page.
+        
+        With ``fields`` the page holds dicts restricted to those fields
+        instead of Expense models.
+        """
+        fields = check_fields(fields)
+        limit = check_limit(limit)
+        
+        lo, hi = 0, len(self._dates)
+        if filters and filters.start_date:
+            lo = bisect.bisect_left(self._dates, self._date_key(filters.start_date))
+        if filters and filters.end_date:
+            hi = bisect.bisect_right(self._dates, self._date_key(filters.end_date))
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            hi = min(hi, self._date_position(cursor_date, cursor_id))
+        
+        category = filters.category if filters else None
+        search_lower = filters.search_term.lower() if filters and filters.search_term else None
+        # None when there is no search term or it is too short for the trigram index
+        matches = self._search.substring_matches(search_lower) if search_lower else None
+        
+        if matches is not None and len(matches) < hi - lo:
+            # Fewer matches than rows in range: order the matches instead of walking the range
+            positions = (self._ref_position(ref) for ref in matches)
+            indices = sorted((i for i in positions if lo <= i < hi), reverse=True)
+        else:
+            # Walk the date index backwards so no sort is needed
+            indices = range(hi - 1, lo - 1, -1)
+        
+        page = []
+        next_cursor = None
+        for i in indices:
+            ref = self._date_refs[i]
+            if matches is not None and ref not in matches:
+                continue
+            # Filter on the stored values; columnar and lazy stores build models only for the page
+            if category and self._category_of(ref) != category:
+                continue
+            if matches is None and search_lower and search_lower not in self._description_of(ref).lower():
+                continue
+            if limit is not None and len(page) == limit:
+                next_cursor = encode_cursor(page[-1])
+                break
+            page.append(self._expense_of(ref))
+        
+        if fields:
+            page = [expense.dict(include=set(fields)) for expense in page]
+        return page, next_cursor
+    
+    @instrumented
+    @locked
+    def search(self, query: str, limit: int = 20) -> List[Expense]:
+        """Find expenses whose description has every query term as a word or word prefix, best match first"""
+        ranked = self._search.search(query)
+        return [self._expense_of(ref) for ref, _ in ranked[:limit]]
     
+    @instrumented
+    @mutation
     def update_expense(self, expense_id: str, update_data: ExpenseUpdate) -> Optional[Expense]:
         """Update an existing expense"""
         if expense_id not in self.expenses:
@@ -86,25 +579,30 @@ class ExpenseStorage:
         expense = self.expenses[expense_id]
         update_dict = update_data.dict(exclude_unset=True)
         
+        self._index_remove(expense)
         for field, value in update_dict.items():
             setattr(expense, field, value)
+        # Assign back: columnar stores hand out copies, not their own rows
+        self.expenses[expense_id] = expense
+        self._index_add(expense)
         
-        self._save_data()
+        self._save_data([("put", expense_id, expense_to_dict(expense))])
         return expense
     
+    @instrumented
+    @mutation
     def delete_expense(self, expense_id: str) -> bool:
         """Delete an expense"""
-        if expense_id in self.expenses:
-            del self.expenses[expense_id]
-            self._save_data()
+        if self._remove(expense_id) is not None:
+            self._save_data([("delete", expense_id, None)])
             return True
         return False
     
+    @instrumented
+    @locked
     def get_summary(self) -> ExpenseSummary:
-        """Get expense summary statistics"""
-        expenses = list(self.expenses.values())
-        
-        if not expenses:
+        """Get expense summary statistics from the running per-category and per-day totals"""
+        if not self.expenses:
             return ExpenseSummary(
                 total_expenses=0.0,
                 monthly_expenses=0.0,
@@ -113,24 +611,25 @@ class ExpenseStorage:
                 categories_breakdown={}
             )
         
-        total_expenses = sum(e.amount for e in expenses)
+        total_cents = sum(self._category_totals.values())
         
-        # Calculate monthly expenses (last 30 days)
+        # Calculate monthly expenses (last 30 days): whole days after the cutoff
+        # come from the daily totals, the rest of the cutoff day from the date index
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        monthly_expenses = sum(
-            e.amount for e in expenses 
-            if e.date >= thirty_days_ago
-        )
+        cutoff_day = thirty_days_ago.date()
+        first_full_day = bisect.bisect_right(self._days, cutoff_day)
+        monthly_cents = sum(self._daily_totals[day] for day in self._days[first_full_day:])
+        next_day = datetime.combine(cutoff_day + timedelta(days=1), datetime.min.time())
+        lo = bisect.bisect_left(self._dates, self._date_key(thirty_days_ago))
+        hi = bisect.bisect_left(self._dates, self._date_key(next_day), lo)
+        monthly_cents += sum(self._cents_of(self._date_refs[i]) for i in range(lo, hi))
         
         # Calculate category breakdown
-        categories_breakdown = {}
-        for category in ExpenseCategory:
-            category_total = sum(
-                e.amount for e in expenses 
-                if e.category == category
-            )
-            if category_total > 0:
-                categories_breakdown[category.value] = category_total
+        categories_breakdown = {
+            category.value: cents / 100
+            for category, cents in self._category_totals.items()
+            if cents > 0
+        }
         
         # Find top category
         top_category = None
@@ -138,29 +637,91 @@ class ExpenseStorage:
             top_category = max(categories_breakdown.keys(), key=lambda k: categories_breakdown[k])
         
         return ExpenseSummary(
-            total_expenses=total_expenses,
-            monthly_expenses=monthly_expenses,
-            expense_count=len(expenses),
+            total_expenses=total_cents / 100,
+            monthly_expenses=monthly_cents / 100,
+            expense_count=len(self.expenses),
             top_category=top_category,
             categories_breakdown=categories_breakdown
         )
     
+    @instrumented
     def export_to_csv(self) -> str:
         """Export expenses to CSV format"""
-        expenses = self.get_all_expenses()
-        
-        if not expenses:
-            return "No expenses to export"
-        
-        csv_lines = ["Date,Description,Category,Amount"]
+        return "".join(self.iter_csv()) or "No expenses to export"
+    
+    def iter_csv(self, filters: Optional[ExpenseFilter] = None, chunk_size: int = 1000) -> Iterator[str]:
+        """Stream filtered expenses as CSV text chunks, newest first"""
+        return iter_csv_chunks(self.get_expenses_page, filters, chunk_size)
+
+
+CSV_HEADER = ["Date", "Description", "Category", "Amount"]
+
+
+def iter_csv_chunks(
+    get_page: Callable[..., Tuple[List[Expense], Optional[str]]],
+    filters: Optional[ExpenseFilter] = None,
+    chunk_size: int = 1000
+) -> Iterator[str]:
+    """Render expenses as CSV one page at a time; yields nothing when no expense matches.
+    
+    Pages are fetched by keyset cursor, so memory stays bounded by
+    ``chunk_size`` and concurrent writes never shift rows between chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    cursor = None
+    first = True
+    
+    while first or cursor:
+        expenses, cursor = get_page(filters, limit=chunk_size, cursor=cursor)
+        if first:
+            if not expenses:
+                return
+            writer.writerow(CSV_HEADER)
+            first = False
         
         for expense in expenses:
-            date_str = expense.date.strftime("%Y-%m-%d")
-            # Escape commas in description
-            description = expense.description.replace('"', '""')
-            if ',' in description:
-                description = f'"{description}"'
-            
-            csv_lines.append(f"{date_str},{description},{expense.category.value},{expense.amount:.2f}")
-        
-        return "\n".join(csv_lines)
\ No newline at end of file
+            writer.writerow([
+                expense.date.strftime("%Y-%m-%d"),
+                expense.description,
+                expense.category.value,
+                f"{expense.amount:.2f}"
+            ])
+        
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+_shared_storages: Dict[Tuple[str, str], Any] = {}
+_shared_storages_lock = threading.Lock()
+
+
+def create_storage(backend: Optional[str] = None):
+    """Return the process-wide storage selected by ``backend`` or $EXPENSE_STORAGE ("json" or "sqlite").
+    
+    Every caller in the process (API and UI threads alike) gets the same
+    instance, so there is a single in-memory state and a single writer per file.
+    Across processes, use the SQLite backend or set $EXPENSE_SHARED.
+    """
+    backend = backend or os.environ.get("EXPENSE_STORAGE", "json")
+    if backend == "sqlite":
+        from sqlite_storage import SqliteExpenseStorage
+        factory, path = SqliteExpenseStorage, "expenses.db"
+    else:
+        columnar = os.environ.get("EXPENSE_COLUMNAR", "") in ("1", "true", "yes")
+        fast_start = os.environ.get("EXPENSE_FAST_START", "") in ("1", "true", "yes")
+        snapshot_format = os.environ.get("EXPENSE_SNAPSHOT_FORMAT", "json")
+        # Set when several worker processes serve the same files (e.g. uvicorn --workers N)
+        shared = os.environ.get("EXPENSE_SHARED", "") in ("1", "true", "yes")
+        factory = functools.partial(
+            ExpenseStorage, columnar=columnar, fast_start=fast_start, snapshot_format=snapshot_format,
+            shared=shared
+        )
+        path = "expenses.json"
+    
+    key = (backend, os.path.abspath(path))
+    with _shared_storages_lock:
+        if key not in _shared_storages:
+            _shared_storages[key] = factory(path)
+        return _shared_storages[key]
@@ -0,0 +1,67 @@
+import importlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from engines import JournalEngine
+from models import ExpenseCategory, ExpenseCreate
+from sqlite_storage import SqliteExpenseStorage
+from storage import ExpenseStorage
+
+# Every storage backend and in-memory layout, by the name tests are parametrized with
+BACKENDS = ("json", "columnar", "fast_start", "sqlite")
+
+
+def expense_data(i: int, **overrides) -> ExpenseCreate:
+    """A valid expense, distinct for every ``i``"""
+    fields = {
+        "amount": 1 + i % 50,
+        "description": f"Coffee #{i}",
+        "category": list(ExpenseCategory)[i % len(ExpenseCategory)],
+        "date": datetime(2024, 1, 1) + timedelta(hours=i),
+    }
+    fields.update(overrides)
+    return ExpenseCreate(**fields)
+
+
+def state(storage: ExpenseStorage) -> dict:
+    """Everything a storage holds, keyed by id, for comparing two instances"""
+    return {expense.id: expense.model_dump() for expense in storage.get_all_expenses()}
+
+
+@pytest.fixture
+def data_file(tmp_path) -> str:
+    return str(tmp_path / "expenses.json")
+
+
+@pytest.fixture
+def open_storage(data_file):
+    """Open a storage on ``data_file``; the journal skips fsync to keep tests fast"""
+    def open_storage(compact_every: int = 1000, **kwargs) -> ExpenseStorage:
+        engine = JournalEngine(data_file, compact_every=compact_every, fsync=False)
+        return ExpenseStorage(data_file, engine=engine, **kwargs)
+    return open_storage
+
+
+@pytest.fixture(params=BACKENDS)
+def make_storage(request, tmp_path):
+    """Open a storage of each backend in ``tmp_path``; calling it again reopens the same files"""
+    def make_storage():
+        if request.param == "sqlite":
+            return SqliteExpenseStorage(str(tmp_path / "expenses.db"), json_file=None)
+        data_file = str(tmp_path / "expenses.json")
+        engine = JournalEngine(data_file, fsync=False)
+        return ExpenseStorage(data_file, engine=engine, **{request.param: True} if request.param != "json" else {})
+    return make_storage
+
+
+@pytest.fixture(scope="session")
+def api_module(tmp_path_factory):
+    """The API module, with its process-wide storage opened in a temporary directory"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+    try:
+        yield importlib.import_module("api")
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from bulk_import import BulkImport
+
+
+def parse(content_type: str, body: bytes, chunk_size: int) -> BulkImport:
+    bulk = BulkImport(content_type)
+    for i in range(0, len(body), chunk_size):
+        bulk.feed(body[i:i + chunk_size])
+    bulk.feed(b"", True)
+    return bulk
+
+
+def records(count: int) -> list:
+    return [
+        {"amount": 1 + i, "description": f"Lunch \"{i}\"", "category": "Food", "date": "2024-03-01T12:00:00"}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_json_array_rows_are_numbered_by_element(chunk_size):
+    rows = records(10)
+    rows[4]["amount"] = -1
+    bulk = parse("application/json", json.dumps(rows).encode(), chunk_size)
+
+    assert len(bulk.valid) == 9
+    assert [error.row for error in bulk.errors] == [5]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_ndjson_rows_are_numbered_by_line(chunk_size):
+    lines = [json.dumps(row) for row in records(5)]
+    lines[2:2] = ["", "not json"]
+    bulk = parse("application/x-ndjson", "\n".join(lines).encode(), chunk_size)
+
+    assert len(bulk.valid) == 5
+    assert [error.row for error in bulk.errors] == [4]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_csv_rows_are_numbered_by_line_counting_the_header(chunk_size):
+    body = (
+        "﻿Date,Description,Category,Amount\r\n"
+        "2024-03-01,\"Two\nlines, \"\"quoted\"\"\",Food,4.5\r\n"
+        "2024-03-01,Bus,Transportation,-2\r\n"
+    ).encode()
+    bulk = parse("text/csv", body, chunk_size)
+
+    assert [expense.description for expense in bulk.valid] == ['Two\nlines, "quoted"']
+    assert [error.row for error in bulk.errors] == [4]
+
+
+@pytest.mark.parametrize("body", [b"", b"{}", b"[{}", b"[{} {}]", b"[] []"])
+def test_malformed_json_array_is_rejected(body):
+    with pytest.raises(ValueError):
+        parse("application/json", body, 2)
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1 << 20])
+def test_malformed_csv_rows_fail_alone(chunk_size):
+    body = (
+        "Date,Description,Category,Amount\n"
+        '2024-03-01,5" screen,Shopping,120\n'
+        f"2024-03-01,{'x' * 200_000},Food,3\n"
+        "2024-03-01,Bus,Transportation,2\n"
+    ).encode()
+    bulk = parse("text/csv", body, chunk_size)
+
+    assert [expense.description for expense in bulk.valid] == ['5" screen', "Bus"]
+    assert [(error.row, error.detail.startswith("Invalid CSV")) for error in bulk.errors] == [(3, True)]
@@ -0,0 +1,100 @@
+import json
+import random
+from array import array
+from datetime import datetime, timedelta
+
+import pytest
+
+from columnar import ColumnarExpenses
+from conftest import expense_data, state
+from engines import expense_to_dict
+from models import Expense, ExpenseCategory, ExpenseFilter, ExpenseUpdate
+from search_index import RowSearchIndex
+
+
+def make_expense(expense_id: str, i: int, **overrides) -> Expense:
+    return Expense.from_create(expense_id, expense_data(i, **overrides))
+
+
+def pages(storage, filters=None, limit=7):
+    """Every page of a cursor walk, as lists of ids"""
+    result, cursor = [], None
+    while True:
+        page, cursor = storage.get_expenses_page(filters, limit=limit, cursor=cursor)
+        result.append([expense.id for expense in page])
+        if cursor is None:
+            return result
+
+
+def test_columnar_indexes_hold_no_object_per_row(open_storage):
+    storage = open_storage(columnar=True)
+    storage.create_many([expense_data(i) for i in range(20)])
+
+    assert isinstance(storage._dates, array) and isinstance(storage._date_refs, array)
+    assert isinstance(storage._search, RowSearchIndex)
+    assert len(storage.expenses._id_keys) == len(storage.expenses._id_rows) == 20
+    assert not storage.expenses._overflow
+
+
+def test_columnar_storage_answers_like_dict_storage(open_storage):
+    rng = random.Random(7)
+    storage = open_storage(columnar=True)
+    # Few distinct dates, so runs of equal dates are ordered by id
+    expenses = storage.create_many([
+        expense_data(i, date=datetime(2024, 1, 1) + timedelta(hours=i % 9)) for i in range(300)
+    ])
+    for i in range(300, 340):
+        expenses.append(storage.create_expense(expense_data(i, date=datetime(2024, 1, 1, i % 9))))
+
+    # Deletes move the last row into the gap; updates keep rows in place
+    rng.shuffle(expenses)
+    for expense in expenses[:120]:
+        assert storage.delete_expense(expense.id)
+    for i, expense in enumerate(expenses[120:160]):
+        storage.update_expense(expense.id, ExpenseUpdate(
+            date=datetime(2024, 1, 1, i % 5), description=f"Tea refill {i}", amount=2.5
+        ))
+    storage.flush()
+
+    reference = open_storage()
+    assert state(storage) == state(reference)
+    for filters in [None, ExpenseFilter(search_term="refill"), ExpenseFilter(search_term="#1"),
+                    ExpenseFilter(category=ExpenseCategory.FOOD, end_date=datetime(2024, 1, 1, 4))]:
+        assert pages(storage, filters) == pages(reference, filters)
+    # Equal scores on equal dates have no set order
+    assert {e.id for e in storage.search("tea refill 1")} == {e.id for e in reference.search("tea refill 1")}
+    assert storage.get_summary() == reference.get_summary()
+
+
+@pytest.mark.parametrize("fast_start", [False, True])
+def test_rows_outside_the_column_layout_are_kept_aside(open_storage, data_file, fast_start):
+    legacy = make_expense("legacy-1", 9)
+    rows = [make_expense(f"00000000-0000-4000-8000-{i:012x}", i) for i in range(5)] + [legacy]
+    with open(data_file, "w") as f:
+        json.dump({expense.id: expense_to_dict(expense) for expense in rows}, f)
+
+    storage = open_storage(columnar=True, fast_start=fast_start)
+    assert storage.get_expense("legacy-1") == legacy
+    # The overflow row is the last one, so deleting the first moves it into row 0
+    storage.delete_expense(rows[0].id)
+    assert storage.expenses.row_of("legacy-1") == 0
+    assert storage.get_expense("legacy-1") == legacy
+    assert [e.id for e in storage.search("coffee 9")] == ["legacy-1"]
+
+    storage.delete_expense("legacy-1")
+    assert storage.get_expense("legacy-1") is None
+    assert [e.id for e in storage.get_all_expenses()] == [e.id for e in reversed(rows[1:5])]
+    assert storage.get_summary().expense_count == 4
+
+
+def test_ids_sharing_their_high_bits_are_told_apart():
+    store = ColumnarExpenses()
+    ids = [f"12345678-9abc-4def-8000-{i:012x}" for i in range(4)]
+    for i, expense_id in enumerate(ids):
+        store[expense_id] = make_expense(expense_id, i)
+
+    del store[ids[0]]
+    assert store.row_of(ids[3]) == 0
+    assert [store[expense_id].description for expense_id in ids[1:]] == ["Coffee #1", "Coffee #2", "Coffee #3"]
+    assert ids[0] not in store and "12345678-9abc-4def-8000-00000000ffff" not in store
+    assert sorted(store) == ids[1:]
@@ -0,0 +1,82 @@
+import csv
+import io
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from conftest import expense_data
+from models import ExpenseCategory, ExpenseFilter
+from storage import CSV_HEADER, iter_csv_chunks
+
+AWKWARD = 'Dinner, "the big one"\nwith friends'
+
+
+def parse(text: str):
+    return list(csv.reader(io.StringIO(text)))
+
+
+def test_rows_are_quoted_and_newest_first(make_storage):
+    storage = make_storage()
+    storage.create_many([expense_data(i) for i in range(5)] + [expense_data(9, description=AWKWARD, amount=3.5)])
+
+    rows = parse("".join(storage.iter_csv()))
+    assert rows[0] == CSV_HEADER
+    assert rows[1] == ["2024-01-01", AWKWARD, list(ExpenseCategory)[9 % len(ExpenseCategory)].value, "3.50"]
+    assert [row[1] for row in rows[2:]] == [f"Coffee #{i}" for i in range(4, -1, -1)]
+    assert storage.export_to_csv() == "".join(storage.iter_csv())
+
+
+def test_chunks_follow_the_filters(make_storage):
+    storage = make_storage()
+    storage.create_many([expense_data(i) for i in range(50)])
+    filters = ExpenseFilter(category=ExpenseCategory.FOOD, start_date=datetime(2024, 1, 1, 6))
+
+    chunks = list(storage.iter_csv(filters, chunk_size=3))
+    expected = [expense.description for expense in storage.get_all_expenses(filters)]
+    assert len(chunks) == -(-len(expected) // 3)
+    assert [row[1] for row in parse("".join(chunks))[1:]] == expected
+
+
+def test_nothing_to_export(make_storage):
+    storage = make_storage()
+    assert list(storage.iter_csv()) == []
+    assert storage.export_to_csv() == "No expenses to export"
+    storage.create_expense(expense_data(1))
+    assert list(storage.iter_csv(ExpenseFilter(search_term="missing"))) == []
+
+
+def test_pages_are_fetched_as_the_export_is_read(open_storage):
+    storage = open_storage()
+    storage.create_many([expense_data(i) for i in range(10)])
+    fetched = []
+
+    def get_page(filters, limit, cursor):
+        page, next_cursor = storage.get_expenses_page(filters, limit=limit, cursor=cursor)
+        fetched.append(len(page))
+        return page, next_cursor
+
+    chunks = iter_csv_chunks(get_page, chunk_size=4)
+    next(chunks)
+    assert fetched == [4]
+    list(chunks)
+    assert fetched == [4, 4, 2]
+
+
+def test_export_endpoint_streams_filtered_csv(api_module):
+    client = TestClient(api_module.app)
+    for i in range(3):
+        response = client.post("/api/expenses", json={
+            "amount": 1 + i, "description": f"{AWKWARD} csvexport{i}", "category": "Shopping",
+            "date": f"2023-03-0{i + 1}T12:00:00"
+        })
+        assert response.status_code == 200
+
+    response = client.get("/api/export/csv", params={"search_term": "csvexport"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = parse(response.text)
+    assert rows[0] == CSV_HEADER
+    assert rows[1:] == [[f"2023-03-0{i + 1}", f"{AWKWARD} csvexport{i}", "Shopping", f"{1 + i}.00"] for i in (2, 1, 0)]
+
+    assert client.get("/api/export/csv", params={"search_term": "no such expense"}).status_code == 404
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import storage as storage_module
+from conftest import expense_data
+from models import ExpenseFilter, ExpenseUpdate
+
+
+def assert_index_matches(storage):
+    expected = sorted((storage._date_key(expense.date), expense.id) for expense in storage.get_all_expenses())
+    ids = [storage._expense_of(ref).id for ref in storage._date_refs]
+    assert list(zip(storage._dates, ids)) == expected
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("insert_max", [0, 1000])
+def test_bulk_inserts_keep_the_date_index_sorted(open_storage, monkeypatch, insert_max, columnar):
+    # 0 forces the append-and-sort path, 1000 the per-row sorted inserts
+    monkeypatch.setattr(storage_module, "SORTED_INSERT_MAX", insert_max)
+    storage = open_storage(columnar=columnar)
+    for i in range(0, 40, 3):
+        storage.create_expense(expense_data(i))
+
+    storage.create_many([expense_data(i, date=datetime(2024, 1, 1) + timedelta(hours=(i * 7) % 40)) for i in range(60)])
+    assert_index_matches(storage)
+
+    # Single inserts after the batch still land in place
+    storage.create_expense(expense_data(100, date=datetime(2024, 1, 1, 5)))
+    assert_index_matches(storage)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_updates_and_deletes_keep_the_date_index_sorted(open_storage, columnar):
+    storage = open_storage(columnar=columnar)
+    expenses = storage.create_many([expense_data(i) for i in range(20)])
+    storage.update_expense(expenses[3].id, ExpenseUpdate(date=datetime(2023, 6, 1)))
+    storage.update_expense(expenses[4].id, ExpenseUpdate(date=expenses[10].date))
+    storage.delete_expense(expenses[15].id)
+
+    assert_index_matches(storage)
+    assert_index_matches(open_storage(columnar=columnar))
+
+
+def test_date_ranges_are_inclusive(make_storage):
+    storage = make_storage()
+    storage.create_many([expense_data(i) for i in range(48)])
+
+    filters = ExpenseFilter(start_date=datetime(2024, 1, 1, 10), end_date=datetime(2024, 1, 2, 10))
+    dates = [expense.date for expense in storage.get_all_expenses(filters)]
+    assert dates == [datetime(2024, 1, 1) + timedelta(hours=hours) for hours in range(34, 9, -1)]
@@ -0,0 +1,43 @@
+import asyncio
+
+from async_storage import AsyncExpenseStorage
+from conftest import expense_data
+from events import format_sse
+
+
+def test_summaries_are_coalesced_across_a_burst_of_writes(make_storage):
+    storage = make_storage()
+    summaries = []
+    get_summary = storage.get_summary
+    storage.get_summary = lambda: summaries.append(1) or get_summary()
+    facade = AsyncExpenseStorage(storage, summary_delay=0.2)
+
+    async def scenario():
+        events = []
+        async with facade.events.subscribe() as queue:
+            await asyncio.gather(*(facade.create_expense(expense_data(i)) for i in range(20)))
+            final = await facade.get_version()
+            while not events or events[-1]["type"] != "summary" or events[-1]["version"] < final:
+                events.append(await asyncio.wait_for(queue.get(), 5))
+        return events
+
+    events = asyncio.run(scenario())
+    assert [event["type"] for event in events].count("created") == 20
+    assert events[-1]["summary"]["expense_count"] == 20
+    # Usually one; a write landing after the delay adds another, never one per write
+    assert len(summaries) <= 2
+
+
+def test_nothing_is_computed_without_subscribers(make_storage):
+    storage = make_storage()
+    storage.get_summary = None
+    facade = AsyncExpenseStorage(storage, summary_delay=0)
+
+    asyncio.run(facade.create_expense(expense_data(1)))
+    assert storage.count() == 1
+
+
+def test_sse_encoding_carries_the_version_as_id():
+    assert format_sse({"type": "deleted", "version": 7, "id": "abc"}) == (
+        'event: deleted\nid: 7\ndata: {"type": "deleted", "version": 7, "id": "abc"}\n\n'
+    )
@@ -0,0 +1,28 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def in_process_client(api_module):
+    """A client for an app serving the API the way main.py does without EXPENSE_API_URL"""
+    target = FastAPI()
+    api_module.install_middlewares(target)
+    target.include_router(api_module.router)
+    return TestClient(target)
+
+
+def test_in_process_requests_are_measured(in_process_client):
+    assert in_process_client.get("/api/categories").status_code == 200
+
+    metrics = in_process_client.get("/metrics").text
+    assert 'expense_http_request_duration_seconds_count{method="GET",route="/api/categories",status="200"}' in metrics
+
+
+def test_in_process_requests_can_be_profiled(in_process_client):
+    response = in_process_client.get("/api/summary", headers={"X-Profile": "1"})
+    assert "X-Profile-Id" in response.headers
+
+    profiles = in_process_client.get("/api/debug/profiles").json()
+    assert profiles[0]["id"] == int(response.headers["X-Profile-Id"])
+    assert profiles[0]["path"] == "/api/summary"
@@ -0,0 +1,87 @@
+import json
+import os
+
+from conftest import expense_data, state
+from models import ExpenseUpdate
+
+
+def test_replay_restores_every_change(open_storage):
+    storage = open_storage()
+    kept = storage.create_expense(expense_data(1))
+    updated = storage.create_expense(expense_data(2))
+    deleted = storage.create_expense(expense_data(3))
+    storage.update_expense(updated.id, ExpenseUpdate(amount=99.5, description="Tea"))
+    storage.delete_expense(deleted.id)
+
+    reopened = open_storage()
+    assert state(reopened) == state(storage)
+    assert set(reopened.expenses) == {kept.id, updated.id}
+    assert reopened.get_expense(updated.id).description == "Tea"
+    assert reopened.get_summary() == storage.get_summary()
+
+
+def test_torn_last_line_is_dropped_and_truncated(open_storage, data_file):
+    storage = open_storage()
+    for i in range(3):
+        storage.create_expense(expense_data(i))
+    journal = storage.engine.journal_file
+    intact_size = os.path.getsize(journal)
+    # A crash mid-append leaves a partial line without its newline
+    with open(journal, "ab") as f:
+        f.write(b'{"op": "put", "id": "torn", "expense": {"amo')
+
+    reopened = open_storage()
+    assert state(reopened) == state(storage)
+    assert os.path.getsize(journal) == intact_size
+
+    # Appends after recovery start on a clean line and survive the next replay
+    created = reopened.create_expense(expense_data(4))
+    assert created.id in open_storage().expenses
+    assert len(open_storage().expenses) == 4
+
+
+def test_corrupt_last_line_is_dropped(open_storage):
+    storage = open_storage()
+    storage.create_expense(expense_data(1))
+    with open(storage.engine.journal_file, "ab") as f:
+        f.write(b"not json\n")
+
+    assert state(open_storage()) == state(storage)
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(open_storage, data_file):
+    storage = open_storage(compact_every=5)
+    for i in range(12):
+        storage.create_expense(expense_data(i))
+
+    # Two compactions happened; only the last two changes are still journaled
+    with open(storage.engine.journal_file) as f:
+        assert len(f.readlines()) == 2
+    with open(data_file) as f:
+        assert len(json.load(f)) == 10
+    assert state(open_storage(compact_every=5)) == state(storage)
+
+
+def test_replay_after_compaction_is_idempotent(open_storage, data_file):
+    storage = open_storage()
+    first = storage.create_expense(expense_data(1))
+    second = storage.create_expense(expense_data(2))
+    storage.update_expense(first.id, ExpenseUpdate(amount=12.25))
+    storage.delete_expense(second.id)
+    journal = storage.engine.journal_file
+    with open(journal, "rb") as f:
+        entries = f.read()
+
+    # A crash between replacing the snapshot and truncating the journal replays
+    # entries that are already part of the snapshot
+    storage.compact()
+    with open(journal, "wb") as f:
+        f.write(entries)
+
+    reopened = open_storage()
+    assert state(reopened) == state(storage)
+    assert reopened.get_summary() == storage.get_summary()
+
+    reopened.compact()
+    assert os.path.getsize(journal) == 0
+    assert state(open_storage()) == state(storage)
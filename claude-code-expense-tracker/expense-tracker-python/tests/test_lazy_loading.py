@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from conftest import expense_data, state
+from lazy_expenses import LazyExpenses
+from models import Expense, ExpenseFilter
+from serializers import get_serializer, iter_json_object
+
+
+@pytest.fixture
+def saved_ledger(open_storage):
+    storage = open_storage()
+    storage.create_many([expense_data(i) for i in range(30)])
+    storage.compact()
+    return state(storage)
+
+
+def test_fast_start_defers_models_until_a_row_is_read(open_storage, saved_ledger):
+    storage = open_storage(fast_start=True)
+    rows = storage.expenses._rows
+    assert isinstance(storage.expenses, LazyExpenses)
+    assert all(isinstance(row, dict) for row in rows.values())
+
+    # Summaries, filters and pages answer from the raw rows
+    assert storage.get_summary().expense_count == 30
+    page, _ = storage.get_expenses_page(ExpenseFilter(search_term="#7"), limit=5)
+    assert sorted(expense.description for expense in page) == ["Coffee #7"]
+    assert sum(isinstance(row, Expense) for row in rows.values()) == 1
+
+    assert state(storage) == saved_ledger
+
+
+def test_fast_start_writes_untouched_rows_back_unchanged(open_storage, data_file, saved_ledger):
+    with open(data_file) as f:
+        before = json.load(f)
+    storage = open_storage(fast_start=True)
+    storage.create_expense(expense_data(99))
+    storage.compact()
+
+    with open(data_file) as f:
+        after = json.load(f)
+    assert len(after) == 31
+    assert {key: after[key] for key in before} == before
+
+
+def test_fast_start_search_builds_its_index_on_first_use(open_storage, saved_ledger):
+    storage = open_storage(fast_start=True)
+    assert [expense.description for expense in storage.search("coffee", limit=3)]
+    assert {expense.description for expense in storage.search("#12")} == {"Coffee #12"}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_streamed_object_matches_json_load(tmp_path, chunk_size):
+    document = {"plain": {"a": [1, 2.5, None]}, 'esc\\"aped': "x,}{", "ünï": True, "last": ""}
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps(document, indent=2))
+
+    assert dict(iter_json_object(str(path), chunk_size=chunk_size)) == document
+    assert dict(get_serializer("json").load(str(path), stream=True)) == document
+    assert dict(get_serializer("json").load(str(path))) == document
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a": 1,}', "[1, 2]", ""])
+def test_streamed_object_rejects_malformed_input(tmp_path, text):
+    path = tmp_path / "snapshot.json"
+    path.write_text(text)
+
+    with pytest.raises(ValueError):
+        list(iter_json_object(str(path), chunk_size=2))
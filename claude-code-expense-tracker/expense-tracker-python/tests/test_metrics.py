@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import expense_data
+from metrics import REGISTRY, Counter, Histogram, Metric
+
+
+def test_metric_families_must_render_samples():
+    with pytest.raises(TypeError):
+        Metric("expense_test", "Incomplete metric")
+
+
+def test_histogram_and_counter_render_the_text_format():
+    histogram = Histogram("expense_test_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    counter = Counter("expense_test_total", "Test counter", ("result",))
+    counter.inc(result="hit")
+    counter.inc(2, result="hit")
+
+    assert histogram.render().splitlines()[2:] == [
+        'expense_test_seconds_bucket{route="/a",le="0.1"} 1',
+        'expense_test_seconds_bucket{route="/a",le="1.0"} 2',
+        'expense_test_seconds_bucket{route="/a",le="+Inf"} 2',
+        'expense_test_seconds_sum{route="/a"} 0.55',
+        'expense_test_seconds_count{route="/a"} 2',
+    ]
+    assert counter.render().splitlines()[2:] == ['expense_test_total{result="hit"} 3']
+
+
+def test_storage_operations_are_labelled_with_their_backend(make_storage):
+    storage = make_storage()
+    storage.create_expense(expense_data(1))
+
+    assert f'backend="{storage.backend}",operation="create_expense"' in REGISTRY.render()
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import expense_data
+from models import ExpenseCategory, ExpenseFilter
+
+
+def fill(storage, count=30):
+    # Every third expense shares a timestamp with its neighbour, so the id breaks ties
+    return [
+        storage.create_expense(expense_data(i, date=datetime(2024, 2, 1, 9 + i // 2)))
+        for i in range(count)
+    ]
+
+
+def newest_first(expenses):
+    return sorted(expenses, key=lambda expense: (expense.date, expense.id), reverse=True)
+
+
+def all_pages(storage, filters=None, limit=7):
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = storage.get_expenses_page(filters, limit=limit, cursor=cursor)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 7, 30, 100])
+def test_pages_walk_the_ledger_newest_first(make_storage, limit):
+    storage = make_storage()
+    expenses = fill(storage)
+
+    pages = all_pages(storage, limit=limit)
+    assert [expense.id for page in pages for expense in page] == [expense.id for expense in newest_first(expenses)]
+    assert all(len(page) == limit for page in pages[:-1])
+    assert storage.get_all_expenses() == newest_first(expenses)
+
+
+def test_pages_apply_filters(make_storage):
+    storage = make_storage()
+    expenses = fill(storage)
+    filters = ExpenseFilter(
+        category=ExpenseCategory.FOOD,
+        start_date=datetime(2024, 2, 1, 12),
+        end_date=datetime(2024, 2, 1, 20),
+    )
+
+    expected = [
+        expense for expense in newest_first(expenses)
+        if expense.category == ExpenseCategory.FOOD and filters.start_date <= expense.date <= filters.end_date
+    ]
+    assert expected
+    assert [expense for page in all_pages(storage, filters, limit=2) for expense in page] == expected
+
+
+def test_a_cursor_survives_writes_before_it(make_storage):
+    storage = make_storage()
+    fill(storage)
+    first, cursor = storage.get_expenses_page(limit=5)
+    storage.create_expense(expense_data(99, date=datetime(2030, 1, 1)))
+    storage.delete_expense(first[0].id)
+
+    second, _ = storage.get_expenses_page(limit=5, cursor=cursor)
+    assert second[0].date <= first[-1].date
+    assert not {expense.id for expense in first} & {expense.id for expense in second}
+
+
+def test_fields_project_each_row(make_storage):
+    storage = make_storage()
+    fill(storage, 3)
+
+    page, _ = storage.get_expenses_page(limit=2, fields=["id", "amount"])
+    assert [set(row) for row in page] == [{"id", "amount"}] * 2
+
+
+@pytest.mark.parametrize("kwargs", [{"limit": 0}, {"limit": -1}, {"cursor": "not a cursor"}, {"fields": ["secret"]}])
+def test_invalid_page_requests_are_rejected(make_storage, kwargs):
+    storage = make_storage()
+    fill(storage, 3)
+
+    with pytest.raises(ValueError):
+        storage.get_expenses_page(**kwargs)
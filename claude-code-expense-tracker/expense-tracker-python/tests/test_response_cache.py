@@ -0,0 +1,71 @@
+from conftest import expense_data
+from response_cache import CachedResponse, ResponseCache, etag_matches
+
+
+def test_cache_is_bounded_by_total_bytes():
+    cache = ResponseCache(max_entries=100, max_bytes=250, max_entry_bytes=100)
+    for version in range(5):
+        cache.put(("/api/expenses", (), version), CachedResponse(b"x" * 100))
+
+    assert len(cache) == 2
+    assert cache.size == 200
+    assert cache.get(("/api/expenses", (), 0)) is None
+    assert cache.get(("/api/expenses", (), 4)) is not None
+
+
+def test_oversized_bodies_are_not_kept():
+    cache = ResponseCache(max_bytes=1000, max_entry_bytes=100)
+    cache.put("small", CachedResponse(b"x" * 100))
+    cache.put("large", CachedResponse(b"x" * 101))
+
+    assert cache.get("large") is None
+    assert cache.size == 100
+
+
+def test_replacing_an_entry_keeps_the_size_exact():
+    cache = ResponseCache()
+    cache.put("key", CachedResponse(b"x" * 10))
+    cache.put("key", CachedResponse(b"x" * 30))
+    assert cache.size == 30
+
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_etag_matching():
+    etag = CachedResponse(b"body").etag
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_unchanged_data_answers_304_and_a_write_changes_the_etag(api_module):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(api_module.app)
+    first = client.get("/api/summary")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get("/api/summary", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    created = client.post("/api/expenses", content=expense_data(1).json(), headers={"Content-Type": "application/json"})
+    assert created.status_code == 200
+    changed = client.get("/api/summary", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_uncached_large_listings_still_answer_304(api_module, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(api_module.response_cache, "max_entry_bytes", 0)
+    client = TestClient(api_module.app)
+    first = client.get("/api/expenses")
+    assert all(key[0] != "/api/expenses" for key in api_module.response_cache._entries)
+
+    assert client.get("/api/expenses", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
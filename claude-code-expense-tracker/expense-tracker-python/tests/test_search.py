@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import search_index
+from conftest import expense_data
+from models import ExpenseFilter, ExpenseUpdate
+from search_index import SearchIndex
+
+WORDS = ["coffee", "coffeehouse", "cafe", "tea", "taxi", "train", "groceries", "grocer", "rent", "cinema"]
+
+
+class Ledger:
+    """Descriptions and dates by id, behind a SearchIndex"""
+
+    def __init__(self, deferred=False):
+        self.descriptions = {}
+        self.dates = {}
+        self.index = SearchIndex(self.descriptions.__getitem__, self.dates.__getitem__, deferred=deferred)
+
+    def add(self, expense_id, description, date=datetime(2024, 1, 1)):
+        self.descriptions[expense_id] = description
+        self.dates[expense_id] = date
+        self.index.add(expense_id, description)
+
+    def remove(self, expense_id):
+        self.index.remove(expense_id, self.descriptions.pop(expense_id))
+        del self.dates[expense_id]
+
+    def substring(self, term):
+        return {i for i, description in self.descriptions.items() if term.lower() in description.lower()}
+
+
+def random_ledger(deferred=False, count=300):
+    rng = random.Random(12)
+    ledger = Ledger(deferred)
+    for i in range(count):
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        ledger.add(f"id-{i}", " ".join(word.title() if rng.random() < 0.5 else word for word in words),
+                   datetime(2024, 1, 1) + timedelta(hours=i))
+    return ledger
+
+
+def test_ranking_prefers_whole_tokens_then_short_descriptions():
+    ledger = Ledger()
+    ledger.add("prefix", "Coffeehouse")
+    ledger.add("long", "Coffee with friends downtown")
+    ledger.add("short", "Coffee")
+    ledger.add("other", "Tea")
+
+    assert [expense_id for expense_id, _ in ledger.index.search("coffee")] == ["short", "long", "prefix"]
+    assert [expense_id for expense_id, _ in ledger.index.search("cof")] == ["short", "prefix", "long"]
+
+
+def test_search_needs_every_term():
+    ledger = random_ledger()
+    for query in ["coffee tea", "gro tax", "cinema rent train", "cafe"]:
+        terms = query.split()
+        expected = {
+            expense_id for expense_id, description in ledger.descriptions.items()
+            if all(any(token.startswith(term) for token in description.lower().split()) for term in terms)
+        }
+        assert {expense_id for expense_id, _ in ledger.index.search(query)} == expected
+    assert ledger.index.search("nothing") == []
+    assert ledger.index.search("  ") == []
+
+
+def test_equal_scores_are_newest_first():
+    ledger = Ledger()
+    for i in range(5):
+        ledger.add(f"id-{i}", "Taxi", datetime(2024, 1, 1 + i))
+    assert [expense_id for expense_id, _ in ledger.index.search("taxi")] == [f"id-{i}" for i in range(4, -1, -1)]
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_substring_matches_equal_a_scan(deferred):
+    ledger = random_ledger(deferred)
+    for term in ["offee", "FEE H", "a t", "groceries rent", "xyz"]:
+        assert ledger.index.substring_matches(term) == ledger.substring(term)
+    # Too short for a trigram: the caller scans instead
+    assert ledger.index.substring_matches("co") is None
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_renumbering_after_many_removals_keeps_results(monkeypatch, deferred):
+    monkeypatch.setattr(search_index, "MAX_HOLES", 8)
+    ledger = random_ledger(deferred)
+    ledger.index.substring_matches("coffee")
+    # Renumbering starts once holes outnumber live rows
+    for i in range(300):
+        if i % 3:
+            ledger.remove(f"id-{i}")
+    ledger.add("late", "Coffee refill")
+
+    # Holes were reclaimed rather than left to pile up
+    assert len(ledger.index._ids) < 300
+    assert ledger.index.substring_matches("coffee") == ledger.substring("coffee")
+    assert [expense_id for expense_id, _ in ledger.index.search("refill")] == ["late"]
+
+
+def test_deferred_index_is_built_by_the_first_query():
+    ledger = random_ledger(deferred=True, count=20)
+    assert ledger.index._tokens == {}
+    ledger.remove("id-3")
+    assert {expense_id for expense_id, _ in ledger.index.search("coffee")} == {
+        expense_id for expense_id, description in ledger.descriptions.items()
+        if any(token.startswith("coffee") for token in description.lower().split())
+    }
+    assert ledger.index._tokens
+
+
+def test_storage_search_term_filter_matches_a_scan(make_storage):
+    storage = make_storage()
+    expenses = storage.create_many([
+        expense_data(i, description=f"{WORDS[i % len(WORDS)]} #{i} {WORDS[(i * 7) % len(WORDS)]}") for i in range(200)
+    ])
+    storage.update_expense(expenses[5].id, ExpenseUpdate(description="Late night coffeehouse"))
+    storage.delete_expense(expenses[6].id)
+    stored = storage.get_all_expenses()
+
+    for term in ["coffee", "#1", "house", "ee", "n #19", "missing"]:
+        expected = [expense.id for expense in stored if term.lower() in expense.description.lower()]
+        found = storage.get_all_expenses(ExpenseFilter(search_term=term))
+        assert [expense.id for expense in found] == expected
+
+
+def test_storage_search_ranks_matches(make_storage):
+    storage = make_storage()
+    storage.create_many([expense_data(i, description=description) for i, description in enumerate(
+        ["Coffee beans and a grocery run", "Coffee", "Groceries", "Train to the coffee fair"]
+    )])
+
+    assert [expense.description for expense in storage.search("coffee")][0] == "Coffee"
+    assert {expense.description for expense in storage.search("coffee gro")} == {"Coffee beans and a grocery run"}
+    assert storage.search("tea") == []
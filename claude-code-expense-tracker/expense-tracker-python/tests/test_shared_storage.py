@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from conftest import expense_data, state
+from engines import FILE_LOCKING
+from models import ExpenseUpdate
+
+pytestmark = pytest.mark.skipif(not FILE_LOCKING, reason="shared mode needs POSIX file locking")
+
+
+def test_writes_are_visible_to_the_other_instance(open_storage):
+    first = open_storage(shared=True)
+    second = open_storage(shared=True)
+
+    created = first.create_expense(expense_data(1))
+    assert second.get_expense(created.id) == created
+
+    second.update_expense(created.id, ExpenseUpdate(amount=42.0))
+    assert first.get_expense(created.id).amount == 42.0
+
+    first.delete_expense(created.id)
+    assert second.get_all_expenses() == []
+    assert second.get_summary().expense_count == 0
+
+
+def test_versions_follow_the_other_instance(open_storage):
+    first = open_storage(shared=True)
+    second = open_storage(shared=True)
+    before = second.version
+
+    first.create_expense(expense_data(1))
+    assert second.version > before
+
+
+def test_compaction_by_one_instance_reloads_the_other(open_storage):
+    first = open_storage(compact_every=4, shared=True)
+    second = open_storage(compact_every=4, shared=True)
+
+    for i in range(10):
+        (first if i % 2 else second).create_expense(expense_data(i))
+    first.compact()
+
+    assert state(second) == state(first)
+    assert len(state(second)) == 10
+
+
+def test_concurrent_writers_lose_nothing(open_storage):
+    storages = [open_storage(compact_every=7, shared=True) for _ in range(3)]
+
+    def write(storage, offset):
+        for i in range(15):
+            storage.create_expense(expense_data(offset + i))
+
+    threads = [threading.Thread(target=write, args=(storage, n * 100)) for n, storage in enumerate(storages)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = state(storages[0])
+    assert len(expected) == 45
+    assert all(state(storage) == expected for storage in storages)
+    assert state(open_storage()) == expected
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import expense_data, state
+from models import ExpenseCategory, ExpenseFilter, ExpenseUpdate
+from sqlite_storage import SqliteExpenseStorage
+
+DESCRIPTIONS = ["Coffee", "50% off shoes", "snake_case book", 'The "big" dinner', "Taxi home", "ab"]
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    return SqliteExpenseStorage(str(tmp_path / "expenses.db"), json_file=None)
+
+
+def fill(storage):
+    return storage.create_many([
+        expense_data(i, description=f"{DESCRIPTIONS[i % len(DESCRIPTIONS)]} {i}") for i in range(60)
+    ])
+
+
+def test_crud_and_version(sqlite_storage):
+    assert sqlite_storage.version == 0
+    expense = sqlite_storage.create_expense(expense_data(1))
+    assert sqlite_storage.get_expense(expense.id) == expense
+    assert sqlite_storage.version == 1
+
+    updated = sqlite_storage.update_expense(expense.id, ExpenseUpdate(amount=12.34, category=ExpenseCategory.BILLS))
+    assert (updated.amount, updated.category, updated.description) == (12.34, ExpenseCategory.BILLS, "Coffee #1")
+    assert sqlite_storage.get_expense(expense.id) == updated
+    assert sqlite_storage.update_expense("missing", ExpenseUpdate(amount=1)) is None
+
+    assert sqlite_storage.delete_expense(expense.id)
+    assert not sqlite_storage.delete_expense(expense.id)
+    assert sqlite_storage.get_expense(expense.id) is None
+    # A delete that removed nothing does not bump the version
+    assert sqlite_storage.version == 3
+    assert sqlite_storage.count() == 0
+
+
+@pytest.mark.parametrize("filters", [
+    ExpenseFilter(category=ExpenseCategory.FOOD),
+    ExpenseFilter(start_date=datetime(2024, 1, 1, 10), end_date=datetime(2024, 1, 2, 12)),
+    ExpenseFilter(category=ExpenseCategory.BILLS, start_date=datetime(2024, 1, 2)),
+    ExpenseFilter(search_term="off"),
+    ExpenseFilter(search_term="50%"),
+    ExpenseFilter(search_term="e_c"),
+    ExpenseFilter(search_term='"big"'),
+    ExpenseFilter(search_term="b"),
+    ExpenseFilter(search_term="HOME 1"),
+])
+def test_filters_match_the_json_backend(sqlite_storage, open_storage, filters):
+    reference = open_storage()
+    for expense in fill(sqlite_storage):
+        reference._put(expense)
+
+    expected = [expense.id for expense in reference.get_all_expenses(filters)]
+    assert [expense.id for expense in sqlite_storage.get_all_expenses(filters)] == expected
+
+
+def test_filters_use_the_indexes(sqlite_storage):
+    def plan(where, *params):
+        rows = sqlite_storage._conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM expenses WHERE {where}", params)
+        return " ".join(row["detail"] for row in rows)
+
+    assert "idx_expenses_date" in plan("date >= ? AND date <= ?", "2024-01-01", "2024-02-01")
+    assert "idx_expenses_category_date" in plan("category = ? AND date >= ?", "Food", "2024-01-01")
+    assert "expenses_fts" in plan(
+        "rowid IN (SELECT rowid FROM expenses_fts WHERE expenses_fts MATCH ?)", '"coffee"'
+    )
+
+
+def test_fts_index_follows_updates_and_deletes(sqlite_storage):
+    expenses = fill(sqlite_storage)
+    sqlite_storage.update_expense(expenses[0].id, ExpenseUpdate(description="Parking ticket"))
+    sqlite_storage.delete_expense(expenses[6].id)
+
+    assert [e.id for e in sqlite_storage.get_all_expenses(ExpenseFilter(search_term="parking"))] == [expenses[0].id]
+    coffee = {e.id for e in sqlite_storage.get_all_expenses(ExpenseFilter(search_term="coffee"))}
+    assert coffee == {expense.id for expense in expenses[12::6]}
+    assert [e.description for e in sqlite_storage.search("parking tick")] == ["Parking ticket"]
+
+
+def test_migrates_the_json_ledger_once(tmp_path, open_storage, data_file):
+    ledger = open_storage()
+    expenses = ledger.create_many([expense_data(i) for i in range(10)])
+    ledger.compact()
+    # Journaled after the snapshot: the import replays both
+    ledger.delete_expense(expenses[0].id)
+    ledger.update_expense(expenses[1].id, ExpenseUpdate(description="Renamed"))
+
+    db_file = str(tmp_path / "expenses.db")
+    storage = SqliteExpenseStorage(db_file, json_file=data_file)
+    assert state(storage) == state(ledger)
+
+    # Reopening does not import again, even if the JSON ledger changed since
+    ledger.create_expense(expense_data(20))
+    assert storage.migrate_from_json(data_file) == 0
+    assert SqliteExpenseStorage(db_file, json_file=data_file).count() == 9
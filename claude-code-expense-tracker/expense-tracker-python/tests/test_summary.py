@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import expense_data
+from models import ExpenseCategory, ExpenseUpdate
+
+
+def expected_summary(expenses) -> dict:
+    """The summary computed the slow way, from every stored expense"""
+    cutoff = datetime.now() - timedelta(days=30)
+    breakdown = {}
+    for expense in expenses:
+        category = ExpenseCategory(expense.category).value
+        breakdown[category] = breakdown.get(category, 0) + expense.amount
+    return {
+        "total_expenses": sum(expense.amount for expense in expenses),
+        "monthly_expenses": sum(expense.amount for expense in expenses if expense.date >= cutoff),
+        "expense_count": len(expenses),
+        "categories_breakdown": breakdown,
+    }
+
+
+def assert_summary_matches(storage):
+    summary = storage.get_summary()
+    expected = expected_summary(storage.get_all_expenses())
+    assert summary.expense_count == expected["expense_count"]
+    assert summary.total_expenses == pytest.approx(expected["total_expenses"])
+    assert summary.monthly_expenses == pytest.approx(expected["monthly_expenses"])
+    assert summary.categories_breakdown == pytest.approx(expected["categories_breakdown"])
+    breakdown = expected["categories_breakdown"]
+    assert summary.top_category == (max(breakdown, key=breakdown.get) if breakdown else None)
+
+
+def test_empty_summary(make_storage):
+    summary = make_storage().get_summary()
+    assert (summary.total_expenses, summary.monthly_expenses, summary.expense_count) == (0, 0, 0)
+    assert summary.top_category is None and summary.categories_breakdown == {}
+
+
+def test_summary_follows_creates_updates_and_deletes(make_storage):
+    storage = make_storage()
+    # Spread over 60 days around the 30-day cutoff, a few minutes off whole hours
+    start = datetime.now() - timedelta(days=60, minutes=7)
+    expenses = storage.create_many([
+        expense_data(i, amount=0.01 + i * 1.37, date=start + timedelta(hours=13 * i)) for i in range(110)
+    ])
+    assert_summary_matches(storage)
+
+    for expense in expenses[:20]:
+        storage.delete_expense(expense.id)
+    for i, expense in enumerate(expenses[20:40]):
+        storage.update_expense(expense.id, ExpenseUpdate(
+            amount=99.99, category=ExpenseCategory.BILLS, date=start + timedelta(days=i * 3)
+        ))
+    assert_summary_matches(storage)
+
+    # Emptying a day drops it from the daily totals
+    day = expenses[60].date.date()
+    for expense in storage.get_all_expenses():
+        if expense.date.date() == day:
+            storage.delete_expense(expense.id)
+    assert_summary_matches(storage)
+    assert_summary_matches(make_storage())
+
+
+def test_summary_totals_do_not_drift(make_storage):
+    storage = make_storage()
+    storage.create_many([expense_data(i, amount=0.1, category=ExpenseCategory.FOOD) for i in range(1000)])
+    for expense in storage.get_all_expenses()[:500]:
+        storage.delete_expense(expense.id)
+
+    summary = storage.get_summary()
+    assert summary.total_expenses == pytest.approx(50.0)
+    assert summary.categories_breakdown == {"Food": pytest.approx(50.0)}
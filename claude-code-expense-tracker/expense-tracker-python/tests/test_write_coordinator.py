@@ -0,0 +1,84 @@
+import threading
+import time
+
+from conftest import expense_data, state
+from engines import JournalEngine
+from storage import ExpenseStorage
+from write_coordinator import WriteCoordinator
+
+
+class SlowJournal(JournalEngine):
+    """Journal whose writes take a while, so writers queue up behind each other"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def write(self, changes, snapshot):
+        self.batches.append(len(changes))
+        time.sleep(0.02)
+        super().write(changes, snapshot)
+
+
+def test_concurrent_writers_share_journal_writes(data_file):
+    engine = SlowJournal(data_file, fsync=False)
+    storage = ExpenseStorage(data_file, engine=engine)
+    barrier = threading.Barrier(20)
+
+    def create(i):
+        barrier.wait()
+        storage.create_expense(expense_data(i))
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(engine.batches) == 20
+    assert len(engine.batches) < 20
+    assert len(state(ExpenseStorage(data_file))) == 20
+
+
+def test_every_writer_of_a_failed_batch_sees_the_error():
+    release = threading.Event()
+
+    def write(changes):
+        release.wait()
+        raise OSError("disk full")
+
+    coordinator = WriteCoordinator(write, window=0.05)
+    errors = []
+
+    def writer(i):
+        batch = coordinator.submit([("put", str(i), {})])
+        try:
+            coordinator.wait(batch)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 5
+
+
+def test_changes_become_durable_before_create_returns(data_file):
+    storage = ExpenseStorage(data_file, engine=JournalEngine(data_file, fsync=False))
+    created = storage.create_expense(expense_data(1))
+
+    # No flush: the journal already holds the change when create_expense returns
+    assert ExpenseStorage(data_file).get_expense(created.id) == created
+
+
+def test_autoflush_off_defers_until_flush(data_file):
+    storage = ExpenseStorage(data_file, engine=JournalEngine(data_file, fsync=False), autoflush=False)
+    created = storage.create_expense(expense_data(1))
+    storage.flush()
+
+    assert ExpenseStorage(data_file).get_expense(created.id) == created
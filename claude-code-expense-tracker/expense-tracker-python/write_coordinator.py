@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, List, Optional
+from engines import Change
+
+
+class WriteBatch:
+    """Changes that will reach the storage engine in one write"""
+
+    __slots__ = ("changes", "waiters", "has_leader", "done", "error")
+
+    def __init__(self):
+        self.changes: List[Change] = []
+        self.waiters = 0
+        self.has_leader = False
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+
+class WriteCoordinator:
+    """Group commit for concurrent writers.
+
+    Writers ``submit`` their changes (in the order they were applied in
+    memory) and then ``wait`` for them to become durable. The first writer to
+    wait on a batch leads it: once the previous batch has been written it
+    flushes every change collected so far in a single ``write`` call, and all
+    writers of the batch return together. A lone writer is flushed at once;
+    when other writers are already queued the leader lingers up to ``window``
+    seconds or until ``max_batch`` changes have accumulated.
+    """
+
+    def __init__(self, write: Callable[[List[Change]], None], window: float = 0.005, max_batch: int = 100):
+        self.write = write
+        self.window = window
+        self.max_batch = max_batch
+        # Held while a batch is being written; take it to exclude writes (e.g. for compaction)
+        self.write_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._current = WriteBatch()
+        self._last_submitted: Optional[WriteBatch] = None
+        self._flushing = False
+
+    def submit(self, changes: List[Change]) -> WriteBatch:
+        """Queue changes for the next write and return the batch that will carry them"""
+        with self._cond:
+            batch = self._current
+            batch.changes.extend(changes)
+            self._last_submitted = batch
+            if len(batch.changes) >= self.max_batch:
+                self._cond.notify_all()
+            return batch
+
+    def wait(self, batch: Optional[WriteBatch] = None):
+        """Block until ``batch`` (by default everything submitted so far) has been written"""
+        with self._cond:
+            if batch is None:
+                batch = self._last_submitted
+            if batch is None or batch.done:
+                return
+
+            batch.waiters += 1
+            if not batch.has_leader:
+                batch.has_leader = True
+                self._lead(batch)
+            while not batch.done:
+                self._cond.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+    def _lead(self, batch: WriteBatch):
+        """Write ``batch`` on behalf of all its writers; called with the condition held"""
+        deadline = time.monotonic() + self.window
+        while True:
+            if self._flushing:
+                self._cond.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if batch.waiters > 1 and len(batch.changes) < self.max_batch and remaining > 0:
+                self._cond.wait(remaining)
+                continue
+            break
+
+        self._flushing = True
+        if self._current is batch:
+            self._current = WriteBatch()
+        self._cond.release()
+        try:
+            with self.write_lock:
+                self.write(batch.changes)
+        except BaseException as e:
+            batch.error = e
+        finally:
+            self._cond.acquire()
+            self._flushing = False
+            batch.done = True
+            self._cond.notify_all()